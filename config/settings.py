@@ -1,39 +1,66 @@
 """Configurações do projeto"""
+import os
 from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent.parent
+BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = BASE_DIR / "logs"
 PDF_DIR = DATA_DIR / "pdfs"
 
-DATA_DIR.mkdir(exist_ok=True)
-LOGS_DIR.mkdir(exist_ok=True)
-PDF_DIR.mkdir(exist_ok=True)
+_dirs_ready = False
 
-CRAWLED_URLS_DB = DATA_DIR / "crawled_urls.json"
+
+def ensure_dirs():
+    """Cria os diretórios de dados e logs (uma vez por processo)
+
+    Chamado pelo ponto de entrada, não no import: os workers do pool de
+    processos importam este módulo e não precisam tocar no disco.
+    """
+    global _dirs_ready
+    if _dirs_ready:
+        return
+    for directory in (DATA_DIR, LOGS_DIR, PDF_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+    _dirs_ready = True
+
+
+CRAWLED_URLS_DB = DATA_DIR / "crawled_urls.db"
 TEXT_OUTPUT_FILE = DATA_DIR / "text_output.txt"
 LOG_FILE = LOGS_DIR / "crawler.log"
 
 MAX_DEPTH = 5
 MAX_PAGES = 25000
-DELAY_BETWEEN_REQUESTS = 0.6
+DELAY_BETWEEN_REQUESTS = 0.6  # por host
+MAX_WORKERS = 16
+PDF_WORKERS = os.cpu_count() or 1
+PDF_SPLIT_MIN_PAGES = 64  # páginas mínimas por tarefa ao dividir um PDF grande entre processos
+PDF_SPLIT_MIN_MB = 4  # abaixo disso o PDF nem é considerado para divisão
+HTML_WORKERS = os.cpu_count() or 1
+SEED_WORKERS = 4  # URLs iniciais rastreadas em paralelo pela GUI
 TIMEOUT = 10
 
+# Pool de conexões HTTP compartilhado (keep-alive) entre HTMLScraper e PDFExtractor
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 64
+HTTP_MAX_RETRIES = 3
+
 HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/pdf;q=0.9,*/*;q=0.1'
 }
 
-IGNORED_EXTENSIONS = {
+IGNORED_EXTENSIONS = frozenset({
     '.jpg', '.jpeg', '.png', '.gif', '.svg', '.ico',
     '.css', '.js', '.woff', '.woff2', '.ttf', '.eot',
     '.mp4', '.avi', '.mov', '.mp3', '.wav',
     '.zip', '.tar', '.gz', '.rar'
-}
+})
 
-ACCEPTED_CONTENT_TYPES = {
+ACCEPTED_CONTENT_TYPES = frozenset({
     'text/html',
     'application/pdf',
     'text/plain'
-}
+})
 
 MAX_PDF_SIZE_MB = 50
+SAVE_PDFS = True  # False: PDFs são processados só em memória
@@ -1,14 +1,89 @@
 import hashlib
 import re
+import threading
 import time
-from collections import Counter, defaultdict
-from datetime import datetime
-from urllib.parse import urlparse
+from collections import OrderedDict, defaultdict
+from urllib.parse import urljoin, urlparse
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import scrapy
 import seaborn as sns
+from lxml import etree
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.threads import deferToThread
+from w3lib.url import canonicalize_url
+
+# Regex para normalizar o HTML antes do hash (colapsa quase-duplicatas)
+DIGIT_RE = re.compile(rb'\d+')
+TAG_ATTR_RE = re.compile(rb'<(\w+)[^>]*>')
+
+# Keywords otimizadas e categorizadas (compiladas uma única vez por processo)
+RELEVANT_PATTERNS = [
+    r'curso[s]?', r'gradua[cç][aã]o', r'p[oó]s-gradua[cç][aã]o',
+    r'mestrado', r'doutorado', r'disciplina[s]?', r'ementa[s]?',
+    r'matr[ií]cula', r'calend[aá]rio', r'hor[aá]rio', r'aula[s]?',
+    r'pesquisa', r'laborat[oó]rio', r'projeto', r'publica[cç][õo][ee]s',
+    r'revista', r'ci[eê]nt[ií]fic[oa]', r'extens[aã]o',
+    r'edital', r'editais', r'processo[- ]seletivo', r'resolu[cç][aã]o',
+    r'portaria', r'normativa', r'regulamento', r'documento',
+    r'biblioteca', r'ru\b', r'restaurante', r'assist[eê]ncia',
+    r'bolsa[s]?', r'aux[ií]lio', r'apoio', r'atendimento',
+    r'docente', r'professor', r'servidor', r'coordena[cç][aã]o'
+]
+# Sem pré-filtro por caracteres: toda URL absoluta já contém letras iniciais das keywords
+# no esquema e no domínio ("https", "unila.edu.br"), então ele nunca descartaria nada
+RELEVANT_RE = re.compile("|".join(f"(?:{p})" for p in RELEVANT_PATTERNS), re.IGNORECASE)
+
+# Extração de texto e links feita inteiramente no libxml2 (XPaths compilados uma vez)
+TEXT_XPATH = etree.XPath(
+    './/*[self::p or self::h1 or self::h2 or self::h3 or self::h4 '
+    'or self::li or self::td or self::div]/text()'
+)
+LINK_XPATH = etree.XPath('//a/@href', smart_strings=False)
+BASE_XPATH = etree.XPath('string(//base/@href)', smart_strings=False)
+WS_RE = re.compile(r'\s+')
+
+# Parsers do lxml não devem ser compartilhados entre threads
+_parsers = threading.local()
+
+
+def html_parser(encoding):
+    """Parser HTML do lxml reutilizado por encoding (um conjunto por thread)"""
+    cache = getattr(_parsers, 'cache', None)
+    if cache is None:
+        cache = _parsers.cache = {}
+    parser = cache.get(encoding)
+    if parser is None:
+        parser = cache[encoding] = etree.HTMLParser(encoding=encoding)
+    return parser
+
+
+def canonicalize_body(body):
+    """Normaliza o HTML removendo atributos de tags e dígitos (datas, contadores)"""
+    body = TAG_ATTR_RE.sub(rb'<\1>', body)
+    return DIGIT_RE.sub(b'', body)
+
+
+def analyze_body(body, encoding):
+    """Retorna (hash, texto, base_href, links) da página; roda fora do thread do reactor"""
+    content_hash = hashlib.blake2b(canonicalize_body(body), digest_size=16).digest()
+    try:
+        root = etree.fromstring(body, html_parser(encoding))
+    except (etree.XMLSyntaxError, ValueError):
+        root = None
+    if root is None:
+        return content_hash, None, '', []
+
+    text = WS_RE.sub(' ', ' '.join(TEXT_XPATH(root))).strip()
+    return content_hash, text, BASE_XPATH(root), LINK_XPATH(root)
+
+
+def url_key(url):
+    """Chave inteira de 64 bits da URL canonicalizada (ordem de query e fragmento ignorados)"""
+    digest = hashlib.blake2b(canonicalize_url(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
 
 
 # ============================
@@ -25,24 +100,38 @@ class Colors:
     BOLD = '\033[1m'
 
 
+_last_second = None
+_last_stamp = ''
+
+
+def _timestamp():
+    """Hora atual em HH:MM:SS, formatada no máximo uma vez por segundo"""
+    global _last_second, _last_stamp
+    second = int(time.time())
+    if second != _last_second:
+        _last_second = second
+        _last_stamp = time.strftime('%H:%M:%S', time.localtime(second))
+    return _last_stamp
+
+
 def log_info(msg):
-    print(f"{Colors.OKCYAN}[{datetime.now().strftime('%H:%M:%S')}] ℹ️  {msg}{Colors.ENDC}")
+    print(f"{Colors.OKCYAN}[{_timestamp()}] ℹ️  {msg}{Colors.ENDC}")
 
 
 def log_success(msg):
-    print(f"{Colors.OKGREEN}[{datetime.now().strftime('%H:%M:%S')}] ✅ {msg}{Colors.ENDC}")
+    print(f"{Colors.OKGREEN}[{_timestamp()}] ✅ {msg}{Colors.ENDC}")
 
 
 def log_warning(msg):
-    print(f"{Colors.WARNING}[{datetime.now().strftime('%H:%M:%S')}] ⚠️  {msg}{Colors.ENDC}")
+    print(f"{Colors.WARNING}[{_timestamp()}] ⚠️  {msg}{Colors.ENDC}")
 
 
 def log_error(msg):
-    print(f"{Colors.FAIL}[{datetime.now().strftime('%H:%M:%S')}] ❌ {msg}{Colors.ENDC}")
+    print(f"{Colors.FAIL}[{_timestamp()}] ❌ {msg}{Colors.ENDC}")
 
 
 def log_progress(msg):
-    print(f"{Colors.OKBLUE}[{datetime.now().strftime('%H:%M:%S')}] 🔄 {msg}{Colors.ENDC}")
+    print(f"{Colors.OKBLUE}[{_timestamp()}] 🔄 {msg}{Colors.ENDC}")
 
 
 def log_header(msg):
@@ -76,6 +165,25 @@ class UnilaDepthSpider(scrapy.Spider):
     allowed_domains = ["unila.edu.br"]
     start_urls = ["https://portal.unila.edu.br"]
 
+    # Extensões de arquivo a ignorar (tupla para str.endswith)
+    IGNORE_EXT = (
+        '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip',
+        '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+        '.mp3', '.mp4', '.avi', '.mov', '.rar', '.7z'
+    )
+    # Prefixos de links que não devem ser seguidos
+    SCHEME_SKIP = ('mailto:', 'tel:', 'javascript:', '#')
+
+    relevant_patterns = RELEVANT_PATTERNS
+    relevant_re = RELEVANT_RE
+
+    # Máximo de hashes de conteúdo mantidos (LRU) em crawls longos
+    CONTENT_HASH_CAPACITY = 100_000
+
+    # Colunas da matriz depth_metrics (linha = profundidade de descoberta)
+    (M_VISITED, M_URLS, M_RELEVANT, M_CONTENT_SIZE,
+     M_UNIQUE, M_DUPLICATES, M_ERRORS) = range(7)
+
     custom_settings = {
         "LOG_LEVEL": "WARNING",
         "DOWNLOAD_DELAY": 0.5,
@@ -85,65 +193,43 @@ class UnilaDepthSpider(scrapy.Spider):
         "RETRY_ENABLED": False,
         "COOKIES_ENABLED": False,
         "DOWNLOAD_TIMEOUT": 20,
+        # BFS: cada URL é registrada na menor profundidade em que aparece
+        "DEPTH_PRIORITY": 1,
+        "SCHEDULER_DISK_QUEUE": "scrapy.squeues.PickleFifoDiskQueue",
+        "SCHEDULER_MEMORY_QUEUE": "scrapy.squeues.FifoMemoryQueue",
+        # Cache de DNS compartilhado e ajuste automático de concorrência
+        "DNSCACHE_ENABLED": True,
+        "DNSCACHE_SIZE": 10_000,
+        "DNS_TIMEOUT": 5,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 8.0,
     }
 
     def __init__(self, max_depth=1, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.max_depth = int(max_depth)
-        self.visited = set()
+        self.visited = set()  # chaves url_key (int), não strings
         self.relevant = set()
-        self.content_hashes = set()
-        self.url_types = Counter()
-        self.content_sizes = []
-        self.errors = 0
-        self.duplicates = 0
+        self.content_hashes = OrderedDict()  # LRU limitado a CONTENT_HASH_CAPACITY
+        self.url_types = defaultdict(int)
         self.start_time = time.time()
         self.last_log_time = time.time()
         self.urls_since_last_log = 0
 
-        # Métricas por profundidade
-        self.depth_metrics = defaultdict(lambda: {
-            'urls': 0,
-            'relevant': 0,
-            'content_size': [],
-        })
-
-        # Keywords otimizadas e categorizadas
-        self.relevant_patterns = [
-            r'curso[s]?', r'gradua[cç][aã]o', r'p[oó]s-gradua[cç][aã]o',
-            r'mestrado', r'doutorado', r'disciplina[s]?', r'ementa[s]?',
-            r'matr[ií]cula', r'calend[aá]rio', r'hor[aá]rio', r'aula[s]?',
-            r'pesquisa', r'laborat[oó]rio', r'projeto', r'publica[cç][õo][ee]s',
-            r'revista', r'ci[eê]nt[ií]fic[oa]', r'extens[aã]o',
-            r'edital', r'editais', r'processo[- ]seletivo', r'resolu[cç][aã]o',
-            r'portaria', r'normativa', r'regulamento', r'documento',
-            r'biblioteca', r'ru\b', r'restaurante', r'assist[eê]ncia',
-            r'bolsa[s]?', r'aux[ií]lio', r'apoio', r'atendimento',
-            r'docente', r'professor', r'servidor', r'coordena[cç][aã]o'
-        ]
-
-        # Compilar regex para performance
-        self.compiled_patterns = [re.compile(p, re.IGNORECASE) for p in self.relevant_patterns]
+        # Métricas por profundidade (uma única passada simula todas as profundidades)
+        self.depth_metrics = np.zeros((self.max_depth + 1, 7), dtype=np.int64)
+        # Instante (s desde o início) da última resposta processada em cada profundidade
+        self.depth_elapsed = np.zeros(self.max_depth + 1, dtype=np.float64)
 
         log_info(f"Spider inicializado - Profundidade máxima: {max_depth}")
 
     def is_relevant_url(self, url):
         """Verifica relevância usando regex otimizado"""
-        url_lower = url.lower()
-        return any(pattern.search(url_lower) for pattern in self.compiled_patterns)
-
-    def extract_clean_text(self, response):
-        """Extração otimizada de texto limpo"""
-        text_parts = response.css(
-            'p::text, h1::text, h2::text, h3::text, h4::text, '
-            'li::text, td::text, div::text'
-        ).getall()
+        return self.relevant_re.search(url) is not None
 
-        clean_text = ' '.join(t.strip() for t in text_parts if t.strip())
-        return clean_text
-
-    def parse(self, response, depth=0):
+    async def parse(self, response):
         url = response.url
+        depth = response.meta.get('depth', 0)  # preenchido pelo DepthMiddleware
 
         # Log de progresso
         self.urls_since_last_log += 1
@@ -161,17 +247,21 @@ class UnilaDepthSpider(scrapy.Spider):
             self.last_log_time = current_time
             self.urls_since_last_log = 0
 
+        self.depth_elapsed[depth] = current_time - self.start_time
+
         # Tratamento de erros
         if response.status >= 400:
-            self.errors += 1
+            self.depth_metrics[depth, self.M_ERRORS] += 1
             log_warning(f"Erro {response.status}: {url[:60]}...")
             return
 
-        if url in self.visited:
-            self.duplicates += 1
+        key = url_key(url)
+        if key in self.visited:
+            self.depth_metrics[depth, self.M_DUPLICATES] += 1
             return
 
-        self.visited.add(url)
+        self.visited.add(key)
+        self.depth_metrics[depth, self.M_VISITED] += 1
 
         # Análise de tipo de URL
         parsed = urlparse(url)
@@ -179,93 +269,110 @@ class UnilaDepthSpider(scrapy.Spider):
         if path_parts:
             self.url_types[path_parts[0]] += 1
 
-        # Verificar tipo de conteúdo
-        content_type = response.headers.get('Content-Type', b'').decode('utf-8', errors='ignore').lower()
-        if not any(t in content_type for t in ['text', 'html', 'xml']):
+        # Verificar tipo de conteúdo (direto nos bytes do header)
+        content_type = (response.headers.get(b'Content-Type') or b'').lower()
+        if not (b'text' in content_type or b'html' in content_type or b'xml' in content_type):
             return
 
         # Verificar relevância da URL
         is_relevant = self.is_relevant_url(url)
 
-        # Análise de conteúdo
-        content = response.text
-        content_hash = hashlib.md5(content.encode('utf-8', errors='ignore')).hexdigest()
+        # Hash, parsing e extração de texto fora do thread do reactor
+        content_hash, clean_text, base_href, links = await maybe_deferred_to_future(
+            deferToThread(analyze_body, response.body, response.encoding)
+        )
 
         if content_hash in self.content_hashes:
-            self.duplicates += 1
+            self.content_hashes.move_to_end(content_hash)
+            self.depth_metrics[depth, self.M_DUPLICATES] += 1
             return
 
-        self.content_hashes.add(content_hash)
+        self.content_hashes[content_hash] = None
+        if len(self.content_hashes) > self.CONTENT_HASH_CAPACITY:
+            self.content_hashes.popitem(last=False)
+        self.depth_metrics[depth, self.M_UNIQUE] += 1
+
+        if clean_text is None:
+            return
 
-        # Extrair e analisar texto
-        clean_text = self.extract_clean_text(response)
         content_size = len(clean_text)
-        self.content_sizes.append(content_size)
 
         # Atualizar métricas por profundidade
-        self.depth_metrics[depth]['urls'] += 1
-        self.depth_metrics[depth]['content_size'].append(content_size)
+        self.depth_metrics[depth, self.M_URLS] += 1
+        self.depth_metrics[depth, self.M_CONTENT_SIZE] += content_size
 
         # Marcar como relevante se tem conteúdo significativo
         if is_relevant and content_size > 300:
             self.relevant.add(url)
-            self.depth_metrics[depth]['relevant'] += 1
+            self.depth_metrics[depth, self.M_RELEVANT] += 1
 
         # Seguir links se não atingiu profundidade máxima
         if depth < self.max_depth:
-            # Extensões de arquivo a ignorar
-            ignore_extensions = {
-                '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.zip',
-                '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-                '.mp3', '.mp4', '.avi', '.mov', '.rar', '.7z'
-            }
-
-            for link in response.css("a::attr(href)").getall():
-                # Filtros otimizados
-                if not link or any([
-                    link.startswith(('mailto:', 'tel:', 'javascript:', '#')),
-                    any(link.lower().endswith(ext) for ext in ignore_extensions)
-                ]):
+            base_url = urljoin(url, base_href)
+            for link in links:
+                # Filtros otimizados (um único lower() por link)
+                if not link:
+                    continue
+                link_lower = link.lower()
+                if link_lower.startswith(self.SCHEME_SKIP) or link_lower.endswith(self.IGNORE_EXT):
                     continue
 
-                # Seguir link com profundidade incrementada
-                yield response.follow(link, callback=self.parse, cb_kwargs={'depth': depth + 1})
+                # Seguir link (o DepthMiddleware incrementa meta['depth'])
+                yield scrapy.Request(urljoin(base_url, link), callback=self.parse)
 
     def closed(self, reason):
         elapsed = round(time.time() - self.start_time, 2)
-        avg_content = sum(self.content_sizes) / len(self.content_sizes) if self.content_sizes else 0
+        totals = self.depth_metrics.sum(axis=0)
         relevance_ratio = len(self.relevant) / len(self.visited) * 100 if self.visited else 0
 
         log_success(f"Spider finalizado - D{self.max_depth}")
         log_info(
             f"Tempo: {elapsed}s | URLs: {len(self.visited)} | Relevantes: {len(self.relevant)} ({relevance_ratio:.1f}%)")
 
-        if self.duplicates > 0:
-            log_warning(f"Duplicatas: {self.duplicates}")
-        if self.errors > 0:
-            log_warning(f"Erros: {self.errors}")
-
-        # Calcular métricas
-        urls_per_sec = len(self.visited) / elapsed if elapsed > 0 else 0
-        relevant_per_sec = len(self.relevant) / elapsed if elapsed > 0 else 0
-        duplicate_ratio = (self.duplicates / len(self.visited) * 100) if len(self.visited) > 0 else 0
-        error_ratio = (self.errors / len(self.visited) * 100) if len(self.visited) > 0 else 0
+        if totals[self.M_DUPLICATES] > 0:
+            log_warning(f"Duplicatas: {totals[self.M_DUPLICATES]}")
+        if totals[self.M_ERRORS] > 0:
+            log_warning(f"Erros: {totals[self.M_ERRORS]}")
+
+        # Métricas acumuladas: a linha d equivale a um crawl com profundidade máxima d
+        cumulative = self.depth_metrics.cumsum(axis=0)
+        elapsed_until = np.maximum.accumulate(self.depth_elapsed)
+
+        for depth in range(1, self.max_depth + 1):
+            result = self._build_result(depth, cumulative[depth], float(elapsed_until[depth]))
+            ResultsStorage.add_result(result)
+            log_success(f"Resultado salvo: D{depth} | ROI={result['roi_score']:.3f}")
+        print()
+
+    def _build_result(self, depth, metrics, elapsed):
+        """Calcula as métricas de uma profundidade a partir dos contadores acumulados"""
+        total_urls = int(metrics[self.M_VISITED])
+        relevant_urls = int(metrics[self.M_RELEVANT])
+        duplicates = int(metrics[self.M_DUPLICATES])
+        errors = int(metrics[self.M_ERRORS])
+        pages = int(metrics[self.M_URLS])
+        avg_content = metrics[self.M_CONTENT_SIZE] / pages if pages else 0
+
+        relevance_ratio = relevant_urls / total_urls * 100 if total_urls else 0
+        urls_per_sec = total_urls / elapsed if elapsed > 0 else 0
+        relevant_per_sec = relevant_urls / elapsed if elapsed > 0 else 0
+        duplicate_ratio = (duplicates / total_urls * 100) if total_urls > 0 else 0
+        error_ratio = (errors / total_urls * 100) if total_urls > 0 else 0
 
         # ROI Score
         quality_factor = (1 - duplicate_ratio / 100) * (1 - error_ratio / 100)
-        roi_score = (len(self.relevant) * quality_factor) / (elapsed + 1) if elapsed > 0 else 0
+        roi_score = (relevant_urls * quality_factor) / (elapsed + 1) if elapsed > 0 else 0
 
         # Eficiência de conteúdo
-        content_efficiency = (len(self.relevant) * avg_content) / (elapsed * 1024) if elapsed > 0 else 0
-
-        # Armazenar resultado
-        result = {
-            "depth": self.max_depth,
-            "total_urls": len(self.visited),
-            "relevant_urls": len(self.relevant),
-            "unique_content": len(self.content_hashes),
-            "duplicates": self.duplicates,
-            "errors": self.errors,
+        content_efficiency = (relevant_urls * avg_content) / (elapsed * 1024) if elapsed > 0 else 0
+
+        return {
+            "depth": depth,
+            "total_urls": total_urls,
+            "relevant_urls": relevant_urls,
+            "unique_content": int(metrics[self.M_UNIQUE]),
+            "duplicates": duplicates,
+            "errors": errors,
             "time_sec": round(elapsed, 2),
             "relevance_ratio": round(relevance_ratio, 2),
             "urls_per_sec": round(urls_per_sec, 2),
@@ -278,10 +385,6 @@ class UnilaDepthSpider(scrapy.Spider):
             "quality_factor": round(quality_factor, 3)
         }
 
-        ResultsStorage.add_result(result)
-
-        log_success(f"Resultado salvo: ROI={roi_score:.3f}\n")
-
 
 # ============================
 # ANÁLISE E RECOMENDAÇÕES
@@ -485,25 +588,37 @@ def create_visualizations(df):
 # EXECUÇÃO PRINCIPAL
 # ============================
 from scrapy.crawler import CrawlerRunner
-from twisted.internet import reactor, defer
+from scrapy.utils.reactor import install_reactor
 
+# Reactor asyncio (epoll no Linux); precisa ser instalado antes do import do reactor
+ASYNCIO_REACTOR = 'twisted.internet.asyncioreactor.AsyncioSelectorReactor'
+REACTOR_THREADPOOL_MAXSIZE = 20
+MAX_PAGES = 25000
+install_reactor(ASYNCIO_REACTOR)
 
-def run_analysis(max_depth=6):
-    """Executa análise sequencial de profundidades sem reiniciar o reactor"""
-    log_header("🚀 ANÁLISE DE PROFUNDIDADE - PORTAL UNILA")
-    log_info(f"Testando profundidades de 1 a {max_depth}")
+from twisted.internet import reactor
 
-    ResultsStorage.clear()
-    runner = CrawlerRunner(settings={'LOG_LEVEL': 'WARNING', 'ROBOTSTXT_OBEY': True})
 
-    @defer.inlineCallbacks
-    def crawl_all():
-        for depth in range(1, max_depth + 1):
-            log_header(f"TESTE {depth}/{max_depth} - PROFUNDIDADE {depth}")
-            yield runner.crawl(UnilaDepthSpider, max_depth=depth)
-        reactor.stop()
+def run_analysis(max_depth=6, max_pages=MAX_PAGES):
+    """Executa um único crawl até max_depth e deriva as métricas de cada profundidade"""
+    log_header("🚀 ANÁLISE DE PROFUNDIDADE - PORTAL UNILA")
+    log_info(f"Testando profundidades de 1 a {max_depth} em uma única passada")
 
-    crawl_all()
+    ResultsStorage.clear()
+    runner = CrawlerRunner(settings={
+        'LOG_LEVEL': 'WARNING',
+        'ROBOTSTXT_OBEY': True,
+        'TWISTED_REACTOR': ASYNCIO_REACTOR,
+        'REACTOR_THREADPOOL_MAXSIZE': REACTOR_THREADPOOL_MAXSIZE,
+        # Limites aplicados pelo próprio Scrapy (DepthMiddleware / CloseSpider)
+        'DEPTH_LIMIT': max_depth,
+        'CLOSESPIDER_PAGECOUNT': max_pages,
+    })
+    # CrawlerRunner não ajusta o threadpool (usado pelo resolvedor de DNS) sozinho
+    reactor.suggestThreadPoolSize(REACTOR_THREADPOOL_MAXSIZE)
+
+    crawl = runner.crawl(UnilaDepthSpider, max_depth=max_depth)
+    crawl.addBoth(lambda _: reactor.stop())
     reactor.run()  # ✅ executa apenas uma vez
 
     # Análise dos resultados
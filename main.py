@@ -1,15 +1,15 @@
 """Script principal do crawler com interface gráfica"""
-import sys
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent
-SRC_DIR = BASE_DIR / "src"
-if str(SRC_DIR) not in sys.path:
-    sys.path.insert(0, str(SRC_DIR))
-
+import contextlib
 import logging
+import mmap
+import os
+import re
 import shutil
+import sys
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from urllib.parse import urlparse
 
 # PyQt6 Imports
@@ -19,30 +19,29 @@ from PyQt6 import QtWidgets, QtCore, QtGui
 try:
     from config.settings import (
         CRAWLED_URLS_DB, TEXT_OUTPUT_FILE, LOG_FILE, PDF_DIR,
-        MAX_DEPTH as DEFAULT_MAX_DEPTH, MAX_PAGES as DEFAULT_MAX_PAGES
+        MAX_DEPTH as DEFAULT_MAX_DEPTH, MAX_PAGES as DEFAULT_MAX_PAGES,
+        SEED_WORKERS, ensure_dirs
     )
 except ImportError:
-    from pathlib import Path
-
     print("Aviso: config/settings.py não encontrado. Usando valores padrão.")
     BASE_DIR = Path(__file__).resolve().parent
     DATA_DIR = BASE_DIR / "data"
     LOGS_DIR = BASE_DIR / "logs"
     PDF_DIR = DATA_DIR / "pdfs"
 
-    DATA_DIR.mkdir(exist_ok=True)
-    LOGS_DIR.mkdir(exist_ok=True)
-    PDF_DIR.mkdir(exist_ok=True)
 
-    CRAWLED_URLS_DB = DATA_DIR / "crawled_urls.json"
+    def ensure_dirs():
+        for directory in (DATA_DIR, LOGS_DIR, PDF_DIR):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    CRAWLED_URLS_DB = DATA_DIR / "crawled_urls.db"
     TEXT_OUTPUT_FILE = DATA_DIR / "text_output.txt"
     LOG_FILE = LOGS_DIR / "crawler.log"
+    SEED_WORKERS = 4
 
-# Módulos src
+# Módulos src (crawler e storages são importados em run_crawler, só quando usados)
 try:
-    from src.crawler import WebCrawler
-    from src.storage import URLStorage, TextStorage
-    from src.utils import setup_logging
+    from src.utils import setup_logging, add_log_handler
 except ImportError:
     print("ERRO CRÍTICO: Módulos 'src' não encontrados. Verifique a estrutura do projeto.")
 
@@ -51,33 +50,171 @@ except ImportError:
         logging.basicConfig(level=logging.INFO, format='%(message)s')
         print(f"Logging 'dummy' configurado para {file}")
 
-# Configurar logging
-setup_logging(LOG_FILE, level=logging.INFO)
+
+    def add_log_handler(handler):
+        if handler not in logging.getLogger().handlers:
+            logging.getLogger().addHandler(handler)
+
+# Diretórios e logging são configurados em main(): os workers dos pools de processos
+# (spawn/forkserver) reimportam este módulo como __mp_main__ e não devem repetir isso
 logger = logging.getLogger(__name__)
 
+# Separador dos banners de log
+SEP_MAJOR = "=" * 70
+
+# URL de semente aceita pela GUI: http(s) sem espaços
+_URL_RE = re.compile(r'https?://\S+')
+_URL_PREFIXES = ('http://', 'https://')
+
+
+def _is_valid_url(url: str) -> bool:
+    # startswith descarta linhas vazias e comentários sem entrar no regex
+    return url.startswith(_URL_PREFIXES) and _URL_RE.fullmatch(url) is not None
+
 
 class TextHandler(logging.Handler, QtCore.QObject):
-    """Handler customizado para logs no Qt"""
-    log_signal = QtCore.pyqtSignal(str)
+    """Handler customizado para logs no Qt
+
+    emit() só guarda a mensagem; um QTimer na thread da GUI descarrega o lote
+    pendente no widget com uma única inserção.
+    """
+    FLUSH_INTERVAL_MS = 80
 
     def __init__(self, text_widget):
         QtCore.QObject.__init__(self)
         logging.Handler.__init__(self)
         self.text_widget = text_widget
-        self.log_signal.connect(self.append_log)
+        # deque.append/popleft são thread-safe: as threads do crawler só enfileiram
+        self._pending = deque()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self._drain)
+        self._timer.start()
 
     def emit(self, record):
-        self.log_signal.emit(self.format(record))
+        self._pending.append(self.format(record))
+
+    def _drain(self):
+        if not self._pending:
+            return
+        # Cada mensagem ocupa ao menos um bloco: o que exceder o limite do documento
+        # seria descartado logo após a inserção, então nem chega ao widget
+        limit = self.text_widget.maximumBlockCount()
+        # Só o que já estava na fila ao início do tick: o drain não persegue o listener
+        popleft = self._pending.popleft
+        batch = [popleft() for _ in range(len(self._pending))]
+        if 0 < limit < len(batch):
+            del batch[:-limit]
+        self.append_log("\n".join(batch))
 
     def append_log(self, msg):
-        self.text_widget.setReadOnly(False)
-        self.text_widget.append(msg)
-        self.text_widget.setReadOnly(True)
+        # appendPlainText() ignora o modo somente leitura, que só vale para edição do usuário
+        self.text_widget.appendPlainText(msg)
         self.text_widget.moveCursor(QtGui.QTextCursor.MoveOperation.End)
 
 
 class CrawlerGUI(QtWidgets.QWidget):
     """Interface gráfica do crawler"""
+    # (urls válidas do arquivo, mensagem de erro) emitido pela thread de leitura
+    urls_loaded = QtCore.pyqtSignal(list, str)
+    # (PDFs removidos, mensagem de erro) emitido pela thread de limpeza
+    database_cleared = QtCore.pyqtSignal(int, str)
+    # (sucesso, mensagem de erro) emitido pela thread do crawler ao terminar
+    crawl_finished = QtCore.pyqtSignal(bool, str)
+
+    LOG_MAX_LINES = 5000
+    PROGRESS_INTERVAL_MS = 500
+    # Acima disso o arquivo de URLs é lido via mmap, linha a linha
+    URL_FILE_MMAP_THRESHOLD = 64 * 1024 * 1024
+    # Acima desse número de blocos removidos, remove_urls recria o modelo
+    REMOVE_RUNS_RESET = 32
+    # Intervalo, em seeds, das linhas de andamento do log
+    SEED_LOG_EVERY = 50
+    CLEAR_DB_MESSAGE = "\n".join((
+        "⚠️ ATENÇÃO ⚠️",
+        "",
+        "Isto apagará:",
+        "• Banco de URLs processadas",
+        "• Textos extraídos",
+        "• PDFs baixados",
+        "• Logs",
+        "",
+        "Deseja continuar?",
+    ))
+
+    # 🎨 PALETA EM TONS DE ROXO (SUAVE)
+    COLORS = {
+        'bg_light': '#f8f3ff',  # roxo bem suave
+        'bg_medium': '#ffffff',
+        'bg_dark': '#efe4ff',  # contraste suave
+        'accent': '#9a6bd8',  # roxo menos saturado
+        'accent_light': '#cbb3f5',  # roxo muito leve
+        'text': '#4a2e70',  # roxo suave para texto
+        'text_dark': '#6a4a89'  # tom mais sóbrio
+    }
+    # Folha de estilos montada uma vez, na definição da classe
+    STYLESHEET = f"""
+        QWidget {{
+            background: #ffffff;
+            color: {COLORS['text']};
+            font-family: Segoe UI, Arial, sans-serif;
+            font-size: 13pt;
+        }}
+        QGroupBox {{
+            border: 2px solid {COLORS['accent']};
+            border-radius: 8px;
+            margin-top: 12px;
+            font-weight: bold;
+            font-size: 15pt;
+        }}
+        QGroupBox:title {{
+            subcontrol-origin: margin;
+            left: 18px;
+            padding: 0 3px;
+            color: {COLORS['accent']};
+            background: #ffffff;
+        }}
+        QPushButton {{
+            background: {COLORS['accent']};
+            color: white;
+            border: none;
+            border-radius: 5px;
+            padding: 8px 16px;
+            font-weight: bold;
+        }}
+        QPushButton:disabled {{
+            background: #ffffff;
+            color: {COLORS['text_dark']};
+        }}
+        QPushButton:hover {{
+            background: {COLORS['accent_light']};
+            color: white;
+        }}
+        QLineEdit, QSpinBox {{
+            background: #ffffff;
+            color: {COLORS['text']};
+            border: 1px solid {COLORS['accent']};
+            border-radius: 4px;
+            font-size: 13pt;
+        }}
+        QSpinBox {{
+            font-size: 16px;
+            padding: 10px;
+            min-width: 120px;
+        }}
+        QLabel#subtitle {{
+            color: {COLORS['text']};
+            margin-bottom: 3px;
+            margin-top: 1px;
+            font-size: 40px;  /* aumento real */
+            font-weight: bold;
+        }}
+        QLabel#statusBar {{
+            color: {COLORS['text_dark']};
+            padding: 2px 6px;
+            font-size: 12pt;
+        }}
+    """
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -85,21 +222,23 @@ class CrawlerGUI(QtWidgets.QWidget):
         self.resize(1100, 800)
         self.setMinimumSize(800, 600)
 
-        # 🎨 PALETA EM TONS DE ROXO (SUAVE)
-        self.colors = {
-            'bg_light': '#f8f3ff',  # roxo bem suave
-            'bg_medium': '#ffffff',
-            'bg_dark': '#efe4ff',  # contraste suave
-            'accent': '#9a6bd8',  # roxo menos saturado
-            'accent_light': '#cbb3f5',  # roxo muito leve
-            'text': '#4a2e70',  # roxo suave para texto
-            'text_dark': '#6a4a89'  # tom mais sóbrio
-        }
+        self.colors = self.COLORS
 
         self.crawler_thread = None
         self.crawler = None
+        self._seeds_done = self._seeds_total = 0
+        self._progress_text = ""
+        self.text_handler = None
         self.is_running = False
+        # Sinal de parada compartilhado com o WebCrawler (acorda esperas entre requisições)
+        self._stop = threading.Event()
         self.urls_list = []
+        # Espelho de urls_list para checagem de duplicatas em O(1)
+        self._urls_set = set()
+
+        self.urls_loaded.connect(self._apply_loaded_urls)
+        self.database_cleared.connect(self._on_database_cleared)
+        self.crawl_finished.connect(self.on_crawling_complete)
 
         self.setup_ui()
         self.setup_logging_handler()
@@ -109,51 +248,13 @@ class CrawlerGUI(QtWidgets.QWidget):
     # ----------------------------------------------------------------------
     def setup_ui(self):
         """Configura interface gráfica"""
-        self.setStyleSheet(f"""
-            QWidget {{
-                background: #ffffff;
-                color: {self.colors['text']};
-                font-family: Segoe UI, Arial, sans-serif;
-                font-size: 13pt;
-            }}
-            QGroupBox {{
-                border: 2px solid {self.colors['accent']};
-                border-radius: 8px;
-                margin-top: 12px;
-                font-weight: bold;
-                font-size: 15pt;
-            }}
-            QGroupBox:title {{
-                subcontrol-origin: margin;
-                left: 18px;
-                padding: 0 3px;
-                color: {self.colors['accent']};
-                background: #ffffff;
-            }}
-            QPushButton {{
-                background: {self.colors['accent']};
-                color: white;
-                border: none;
-                border-radius: 5px;
-                padding: 8px 16px;
-                font-weight: bold;
-            }}
-            QPushButton:disabled {{
-                background: #ffffff;
-                color: {self.colors['text_dark']};
-            }}
-            QPushButton:hover {{
-                background: {self.colors['accent_light']};
-                color: white;
-            }}
-            QLineEdit, QSpinBox {{
-                background: #ffffff;
-                color: {self.colors['text']};
-                border: 1px solid {self.colors['accent']};
-                border-radius: 4px;
-                font-size: 13pt;
-            }}
-        """)
+        self.setStyleSheet(self.STYLESHEET)
+
+        # Fontes criadas uma vez e compartilhadas pelos widgets (e pelo diálogo de URL)
+        self._label_font = QtGui.QFont("Arial", 20, QtGui.QFont.Weight.Bold)
+        self._mono_font = QtGui.QFont("Consolas", 13)
+        self._dialog_font = QtGui.QFont("Segoe UI", 13)
+        self._dialog_bold_font = QtGui.QFont("Segoe UI", 13, QtGui.QFont.Weight.Bold)
 
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setSpacing(4)
@@ -164,25 +265,14 @@ class CrawlerGUI(QtWidgets.QWidget):
         # ------------------------------------------------------------------
         subtitle = QtWidgets.QLabel("UNILA's Capivara.AI Chatbot Information Capture")
         subtitle.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        subtitle.setStyleSheet(
-            f"""
-            QLabel {{
-                color: {self.colors['text']};
-                background: #ffffff;
-                margin-bottom: 3px;
-                margin-top: 1px;
-                font-size: 40px;  /* aumento real */
-                font-weight: bold;
-            }}
-            """
-        )
+        subtitle.setObjectName("subtitle")
         main_layout.addWidget(subtitle)
 
         # ------------------------------------------------------------------
         # ⭐ CONTAINER DAS IMAGENS (FUNDO GARANTIDO)
         # ------------------------------------------------------------------
+        # Fundo branco vem da regra QWidget da folha de estilo principal
         img_container = QtWidgets.QWidget()
-        img_container.setStyleSheet("background: #ffffff;")
 
         img_layout = QtWidgets.QHBoxLayout(img_container)
         img_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
@@ -190,7 +280,6 @@ class CrawlerGUI(QtWidgets.QWidget):
 
         # Imagem 1 UNILA
         unila_label = QtWidgets.QLabel()
-        unila_label.setStyleSheet("background: #ffffff;")
         unila_pix = QtGui.QPixmap("image/unila.png").scaledToWidth(
             int(120 * 1.5), QtCore.Qt.TransformationMode.SmoothTransformation
         )
@@ -198,7 +287,6 @@ class CrawlerGUI(QtWidgets.QWidget):
 
         # Imagem 2 LACA
         laca_label = QtWidgets.QLabel()
-        laca_label.setStyleSheet("background: #ffffff;")
         laca_pix = QtGui.QPixmap("image/laca.png").scaledToWidth(
             int(120 * 1.5), QtCore.Qt.TransformationMode.SmoothTransformation
         )
@@ -219,7 +307,11 @@ class CrawlerGUI(QtWidgets.QWidget):
         url_layout = QtWidgets.QVBoxLayout(url_group)
         main_layout.addWidget(url_group)
 
-        self.urls_listbox = QtWidgets.QListWidget()
+        # Modelo de strings espelhando urls_list: cargas em lote viram um único setStringList
+        self._urls_model = QtCore.QStringListModel(self)
+        self.urls_listbox = QtWidgets.QListView()
+        self.urls_listbox.setModel(self._urls_model)
+        self.urls_listbox.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         self.urls_listbox.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
         self.urls_listbox.setFixedHeight(120)
         url_layout.addWidget(self.urls_listbox)
@@ -229,40 +321,38 @@ class CrawlerGUI(QtWidgets.QWidget):
         btn_add = QtWidgets.QPushButton("➕ Adicionar URL")
         btn_add.clicked.connect(self.add_url)
         url_btns.addWidget(btn_add)
-        btn_load = QtWidgets.QPushButton("📄 Carregar Arquivo")
-        btn_load.clicked.connect(self.load_urls_from_file)
-        url_btns.addWidget(btn_load)
+        self.load_button = QtWidgets.QPushButton("📄 Carregar Arquivo")
+        self.load_button.clicked.connect(self.load_urls_from_file)
+        url_btns.addWidget(self.load_button)
         btn_remove = QtWidgets.QPushButton("🗑 Remover Selecionadas")
         btn_remove.clicked.connect(self.remove_urls)
         url_btns.addWidget(btn_remove)
-        btn_clear_db = QtWidgets.QPushButton("🧹 Limpar Base de Dados")
-        btn_clear_db.clicked.connect(self.clear_database)
-        url_btns.addWidget(btn_clear_db)
+        self.clear_db_button = QtWidgets.QPushButton("🧹 Limpar Base de Dados")
+        self.clear_db_button.clicked.connect(self.clear_database)
+        url_btns.addWidget(self.clear_db_button)
 
         config_group = QtWidgets.QGroupBox("Configurações")
         config_layout = QtWidgets.QGridLayout(config_group)
         main_layout.addWidget(config_group)
 
         label_maxpages = QtWidgets.QLabel("Máx. Páginas:")
-        label_maxpages.setFont(QtGui.QFont("Arial", 20, QtGui.QFont.Weight.Bold))
+        label_maxpages.setFont(self._label_font)
         config_layout.addWidget(label_maxpages, 0, 0)
 
         self.max_pages_spinbox = QtWidgets.QSpinBox()
         self.max_pages_spinbox.setMinimum(1)
         self.max_pages_spinbox.setMaximum(1000000)
         self.max_pages_spinbox.setValue(DEFAULT_MAX_PAGES)
-        self.max_pages_spinbox.setStyleSheet("font-size: 16px; padding: 10px; min-width: 120px;")
         config_layout.addWidget(self.max_pages_spinbox, 0, 1)
 
         label_depth = QtWidgets.QLabel("Profundidade:")
-        label_depth.setFont(QtGui.QFont("Arial", 20, QtGui.QFont.Weight.Bold))
+        label_depth.setFont(self._label_font)
         config_layout.addWidget(label_depth, 0, 2)
 
         self.max_depth_spinbox = QtWidgets.QSpinBox()
         self.max_depth_spinbox.setMinimum(1)
         self.max_depth_spinbox.setMaximum(10)
         self.max_depth_spinbox.setValue(DEFAULT_MAX_DEPTH)
-        self.max_depth_spinbox.setStyleSheet("font-size: 16px; padding: 10px; min-width: 120px;")
         config_layout.addWidget(self.max_depth_spinbox, 0, 3)
 
         btns_layout = QtWidgets.QHBoxLayout()
@@ -285,25 +375,29 @@ class CrawlerGUI(QtWidgets.QWidget):
         log_layout = QtWidgets.QVBoxLayout(log_group)
         main_layout.addWidget(log_group, stretch=1)
 
-        self.log_text = QtWidgets.QTextEdit()
+        # QPlainTextEdit: layout por linha, sem detecção de rich text a cada inserção
+        self.log_text = QtWidgets.QPlainTextEdit()
         self.log_text.setReadOnly(True)
-        self.log_text.setFont(QtGui.QFont("Consolas", 13))
+        # Mantém só as últimas linhas: o Qt descarta as mais antigas de uma vez
+        self.log_text.setMaximumBlockCount(self.LOG_MAX_LINES)
+        self.log_text.setFont(self._mono_font)
         log_layout.addWidget(self.log_text)
 
         self.progress_label = QtWidgets.QLabel("Aguardando início...")
         self.progress_label.setFont(QtGui.QFont("Segoe UI", 11))
         main_layout.addWidget(self.progress_label)
 
+        # Barra determinada (páginas processadas / limite), sem animação contínua
         self.progress = QtWidgets.QProgressBar()
         self.progress.setMinimum(0)
-        self.progress.setMaximum(0)
         self.progress.setVisible(False)
         main_layout.addWidget(self.progress)
+        self._progress_timer = QtCore.QTimer(self)
+        self._progress_timer.setInterval(self.PROGRESS_INTERVAL_MS)
+        self._progress_timer.timeout.connect(self._update_progress)
 
         self.status_bar = QtWidgets.QLabel("Pronto | 0 URLs carregadas")
-        self.status_bar.setStyleSheet(
-            f"background: #ffffff; color: {self.colors['text_dark']}; padding: 2px 6px; font-size: 12pt;"
-        )
+        self.status_bar.setObjectName("statusBar")
         self.status_bar.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
         main_layout.addWidget(self.status_bar)
 
@@ -312,9 +406,12 @@ class CrawlerGUI(QtWidgets.QWidget):
     # -------------------------------------------------------
 
     def setup_logging_handler(self):
-        text_handler = TextHandler(self.log_text)
-        text_handler.setFormatter(logging.Formatter('%(message)s'))
-        logging.getLogger().addHandler(text_handler)
+        # Um único TextHandler por janela, reaproveitado a cada reconfiguração
+        if self.text_handler is None:
+            self.text_handler = TextHandler(self.log_text)
+            self.text_handler.setFormatter(logging.Formatter('%(message)s'))
+        # Consumido pelo QueueListener: as threads do crawler só fazem put()
+        add_log_handler(self.text_handler)
 
     def add_url(self):
         dialog = QtWidgets.QDialog(self)
@@ -322,11 +419,11 @@ class CrawlerGUI(QtWidgets.QWidget):
         dialog.setFixedSize(550, 140)
         layout = QtWidgets.QVBoxLayout(dialog)
         label = QtWidgets.QLabel("URL:")
-        label.setFont(QtGui.QFont("Segoe UI", 13, QtGui.QFont.Weight.Bold))
+        label.setFont(self._dialog_bold_font)
         layout.addWidget(label)
         url_entry = QtWidgets.QLineEdit()
         url_entry.setText("https://divulga.unila.edu.br/laca")
-        url_entry.setFont(QtGui.QFont("Segoe UI", 13))
+        url_entry.setFont(self._dialog_font)
         layout.addWidget(url_entry)
         btns = QtWidgets.QHBoxLayout()
         layout.addLayout(btns)
@@ -338,10 +435,13 @@ class CrawlerGUI(QtWidgets.QWidget):
 
         def on_add():
             url = url_entry.text().strip()
-            if url and url.startswith(('http://', 'https://')):
-                if url not in self.urls_list:
+            if _is_valid_url(url):
+                if url not in self._urls_set:
                     self.urls_list.append(url)
-                    self.urls_listbox.addItem(url)
+                    self._urls_set.add(url)
+                    row = self._urls_model.rowCount()
+                    self._urls_model.insertRows(row, 1)
+                    self._urls_model.setData(self._urls_model.index(row), url)
                     self.update_status()
                     dialog.accept()
                 else:
@@ -359,63 +459,138 @@ class CrawlerGUI(QtWidgets.QWidget):
             self, "Selecionar arquivo com URLs", "", "Arquivos de texto (*.txt);;Todos os arquivos (*)"
         )
         if file_path:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                added = 0
-                for line in lines:
-                    url = line.strip()
-                    if url.startswith(('http://', 'https://')) and url not in self.urls_list:
-                        self.urls_list.append(url)
-                        self.urls_listbox.addItem(url)
-                        added += 1
-                self.update_status()
-                QtWidgets.QMessageBox.information(self, "Sucesso", f"{added} URLs adicionadas!")
-            except Exception as e:
-                QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao carregar arquivo:\n{e}")
+            # Leitura e filtragem fora da thread da GUI; o resultado volta por sinal
+            self.load_button.setEnabled(False)
+            self.status_bar.setText("Carregando arquivo de URLs...")
+            threading.Thread(target=self._parse_urls_worker, args=(file_path,), daemon=True).start()
+
+    @classmethod
+    def _iter_url_lines(cls, file_path):
+        """Linhas do arquivo de URLs, sem carregar arquivos enormes inteiros na memória"""
+        if os.path.getsize(file_path) < cls.URL_FILE_MMAP_THRESHOLD:
+            # splitlines já remove \n e \r\n; strip() só copia se houver espaços.
+            # Bytes inválidos viram U+FFFD e a linha é descartada pela validação,
+            # em vez de abortar a leitura do arquivo inteiro
+            text = Path(file_path).read_text(encoding='utf-8', errors='replace')
+            yield from (line.strip() for line in text.splitlines())
+            return
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b''):
+                yield raw.strip().decode('utf-8', 'ignore')
+
+    def _parse_urls_worker(self, file_path):
+        try:
+            urls = self._iter_url_lines(file_path)
+            # dict.fromkeys remove repetições do próprio arquivo mantendo a ordem
+            self.urls_loaded.emit(list(dict.fromkeys(u for u in urls if _is_valid_url(u))), "")
+        except Exception as e:
+            self.urls_loaded.emit([], str(e))
+
+    def _apply_loaded_urls(self, urls, error_msg):
+        self.load_button.setEnabled(True)
+        if error_msg:
+            self.update_status()
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao carregar arquivo:\n{error_msg}")
+            return
+        seen = self._urls_set
+        new_urls = [url for url in urls if url not in seen]
+        if new_urls:
+            seen.update(new_urls)
+            # Uma única ressincronização do modelo para o arquivo inteiro
+            self.urls_list.extend(new_urls)
+            self._urls_model.setStringList(self.urls_list)
+        self.update_status()
+        QtWidgets.QMessageBox.information(self, "Sucesso", f"{len(new_urls)} URLs adicionadas!")
 
     def remove_urls(self):
-        selected = self.urls_listbox.selectedIndexes()
+        selected = self.urls_listbox.selectionModel().selectedIndexes()
         if not selected:
             QtWidgets.QMessageBox.warning(self, "Aviso", "Selecione URLs para remover!")
             return
-        for idx in sorted(selected, key=lambda x: x.row(), reverse=True):
-            url = self.urls_listbox.item(idx.row()).text()
-            self.urls_list.remove(url)
-            self.urls_listbox.takeItem(idx.row())
+        rows = sorted({idx.row() for idx in selected})
+        selected_rows = set(rows)
+        # Só as URLs removidas saem do conjunto; o restante não é re-hasheado
+        self._urls_set.difference_update(self.urls_list[row] for row in rows)
+        self.urls_list = [url for i, url in enumerate(self.urls_list) if i not in selected_rows]
+
+        # Remove blocos contíguos de linhas de uma vez, de baixo para cima
+        model = self._urls_model
+        runs = []
+        for row in rows:
+            if runs and row == runs[-1][1] + 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        if len(runs) > self.REMOVE_RUNS_RESET:
+            # Seleção muito espalhada: cada removeRows desloca o resto da lista,
+            # então um único reset a partir de urls_list sai mais barato
+            model.setStringList(self.urls_list)
+        else:
+            for first, last in reversed(runs):
+                model.removeRows(first, last - first + 1)
         self.update_status()
 
     def clear_database(self):
-        msg = (
-            "⚠️ ATENÇÃO ⚠️\n\n"
-            "Isto apagará:\n"
-            "• Banco de URLs processadas\n"
-            "• Textos extraídos\n"
-            "• PDFs baixados\n"
-            "• Logs\n\n"
-            "Deseja continuar?"
-        )
+        # is_running cai já no clique em Parar; a thread ainda drena com o banco aberto
+        if self.is_running or (self.crawler_thread is not None and self.crawler_thread.is_alive()):
+            QtWidgets.QMessageBox.warning(self, "Aviso", "Pare o crawling antes de limpar a base!")
+            return
         reply = QtWidgets.QMessageBox.question(
-            self, "Confirmar", msg,
+            self, "Confirmar", self.CLEAR_DB_MESSAGE,
             QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
         )
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
+            # Remoção dos arquivos fora da thread da GUI; o resultado volta por sinal
+            self.clear_db_button.setEnabled(False)
+            self.start_button.setEnabled(False)
+            self.progress.setRange(0, 0)
+            self.progress.setVisible(True)
+            self.status_bar.setText("Limpando base de dados...")
+            threading.Thread(target=self._clear_database_worker, daemon=True).start()
+
+    def _clear_database_worker(self):
+        try:
+            # Banco SQLite, seus arquivos de WAL e o antigo JSON do TinyDB (senão
+            # URLStorage o importaria de volta ao recriar o banco)
+            for db_file in (CRAWLED_URLS_DB,
+                            CRAWLED_URLS_DB.with_name(CRAWLED_URLS_DB.name + '-wal'),
+                            CRAWLED_URLS_DB.with_name(CRAWLED_URLS_DB.name + '-shm'),
+                            CRAWLED_URLS_DB.with_suffix('.json')):
+                db_file.unlink(missing_ok=True)
+            TEXT_OUTPUT_FILE.unlink(missing_ok=True)
+            # Uma única passada pelo diretório (sem stat prévio): conta e remove os PDFs
+            pdf_count = 0
             try:
-                if CRAWLED_URLS_DB.exists():
-                    CRAWLED_URLS_DB.unlink()
-                if TEXT_OUTPUT_FILE.exists():
-                    TEXT_OUTPUT_FILE.unlink()
-                if PDF_DIR.exists():
-                    shutil.rmtree(PDF_DIR)
-                    PDF_DIR.mkdir(exist_ok=True)
-                if LOG_FILE.exists():
-                    LOG_FILE.unlink()
-                setup_logging(LOG_FILE, level=logging.INFO)
-                self.setup_logging_handler()
-                QtWidgets.QMessageBox.information(self, "Sucesso", "Base de dados limpa!")
-            except Exception as e:
-                logger.error(f"❌ Erro ao limpar base: {e}")
-                QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao limpar:\n{e}")
+                with os.scandir(PDF_DIR) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            shutil.rmtree(entry.path)
+                            continue
+                        if entry.name.endswith('.pdf'):
+                            pdf_count += 1
+                        os.unlink(entry.path)
+            except FileNotFoundError:
+                PDF_DIR.mkdir(parents=True, exist_ok=True)
+            LOG_FILE.unlink(missing_ok=True)
+            self.database_cleared.emit(pdf_count, "")
+        except Exception as e:
+            self.database_cleared.emit(0, str(e))
+
+    def _on_database_cleared(self, pdf_count, error_msg):
+        self.progress.setVisible(False)
+        self.clear_db_button.setEnabled(True)
+        self.start_button.setEnabled(True)
+        self.update_status()
+        if error_msg:
+            logger.error(f"❌ Erro ao limpar base: {error_msg}")
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao limpar:\n{error_msg}")
+            return
+        # Logging reconfigurado aqui, na thread da GUI, que é dona do TextHandler
+        setup_logging(LOG_FILE, level=logging.INFO)
+        self.setup_logging_handler()
+        QtWidgets.QMessageBox.information(
+            self, "Sucesso", f"Base de dados limpa! ({pdf_count} PDFs removidos)"
+        )
 
     def update_status(self):
         count = len(self.urls_list)
@@ -430,75 +605,126 @@ class CrawlerGUI(QtWidgets.QWidget):
 
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
+        self.clear_db_button.setEnabled(False)
         self.max_pages_spinbox.setEnabled(False)
         self.max_depth_spinbox.setEnabled(False)
+        # Valores lidos aqui, na thread da GUI: a thread do crawler não toca em widgets
+        max_pages = self.max_pages_spinbox.value()
+        max_depth = self.max_depth_spinbox.value()
+        self.progress.setMaximum(max_pages)
+        self.progress.setValue(0)
         self.progress.setVisible(True)
+        # Seeds concluídas: só a thread do crawler escreve, o timer da GUI lê
+        self._seeds_done = 0
+        self._seeds_total = len(self.urls_list)
+        self._progress_text = ""
+        self._progress_timer.start()
         self.progress_label.setText("Crawling em andamento...")
 
         self.is_running = True
-        self.crawler_thread = threading.Thread(target=self.run_crawler, daemon=True)
+        self._stop.clear()
+        # Cópia da lista: add_url/remove_urls seguem livres durante o crawl
+        self.crawler_thread = threading.Thread(
+            target=self.run_crawler, args=(list(self.urls_list), max_pages, max_depth),
+            daemon=True
+        )
         self.crawler_thread.start()
 
-    def run_crawler(self):
+    def run_crawler(self, urls, max_pages, max_depth):
+        success, error_msg = True, ""
+        self.crawler = None
         try:
-            max_pages = self.max_pages_spinbox.value()
-            max_depth = self.max_depth_spinbox.value()
-
-            url_storage = URLStorage(CRAWLED_URLS_DB)
-            text_storage = TextStorage(TEXT_OUTPUT_FILE)
-
-            self.crawler = WebCrawler(
-                url_storage=url_storage,
-                text_storage=text_storage,
-                max_depth=max_depth,
-                max_pages=max_pages
-            )
+            # Importados aqui: requests, parsers e pypdfium2 ficam fora da abertura da janela
+            from src.crawler import WebCrawler
+            from src.storage import URLStorage, TextStorage, FrontierStorage
+
+            # Fecha (em ordem inversa) tudo o que foi aberto, mesmo se WebCrawler() falhar
+            with contextlib.ExitStack() as stack:
+                url_storage = stack.enter_context(URLStorage(CRAWLED_URLS_DB))
+                text_storage = stack.enter_context(TextStorage(TEXT_OUTPUT_FILE))
+                # Mesmo arquivo do banco de URLs: limpar a base também zera a fila
+                frontier_storage = stack.enter_context(FrontierStorage(CRAWLED_URLS_DB))
+
+                self.crawler = stack.enter_context(WebCrawler(
+                    url_storage=url_storage,
+                    text_storage=text_storage,
+                    max_depth=max_depth,
+                    max_pages=max_pages,
+                    frontier_storage=frontier_storage,
+                    stop_event=self._stop
+                ))
+
+                logger.info(SEP_MAJOR)
+                logger.info("🚀 Iniciando crawling (%d URLs)", len(urls))
+                logger.info(SEP_MAJOR)
+
+                # Seeds rastreadas em paralelo: o tempo é dominado por espera de rede,
+                # e o limite de páginas e o politeness por host seguem compartilhados
+                with ThreadPoolExecutor(max_workers=SEED_WORKERS,
+                                        thread_name_prefix="seed") as pool:
+                    futures = [pool.submit(self._crawl_seed, url, idx, len(urls))
+                               for idx, url in enumerate(urls, 1)]
+                    crawler = self.crawler
+                    for _ in as_completed(futures):
+                        self._seeds_done += 1
+                        done = crawler.pages_processed + crawler.pdfs_processed
+                        if self._stop.is_set() or done >= max_pages:
+                            # Seeds ainda não iniciadas não chegam a rodar
+                            for future in futures:
+                                future.cancel()
+                            break
 
-            logger.info("=" * 70)
-            logger.info(f"🚀 Iniciando crawling ({len(self.urls_list)} URLs)")
-            logger.info("=" * 70)
-
-            for url in self.urls_list:
-                if not self.is_running:
-                    break
-
-                logger.info(f"\nProcessando: {url}\n" + "-" * 50)
+        except Exception as e:
+            logger.error(f"Erro fatal no crawler: {e}")
+            success, error_msg = False, str(e)
+        finally:
+            # Único ponto de conclusão, só depois de fechar storages e pools:
+            # a GUI não libera um novo crawl com o anterior ainda gravando
+            self.crawl_finished.emit(success, error_msg)
 
-                parsed_url = urlparse(url)
-                allowed_netloc = parsed_url.netloc
+    def _crawl_seed(self, url, idx, total):
+        """Rastreia uma URL inicial restrita ao seu domínio (roda no pool de seeds)"""
+        if self._stop.is_set():
+            return
 
-                def url_filter(candidate):
-                    return urlparse(candidate).netloc == allowed_netloc
+        # Cada crawl já abre com o próprio cabeçalho; aqui só o andamento, de tempos em tempos
+        if idx == 1 or idx == total or idx % self.SEED_LOG_EVERY == 0:
+            logger.info("📍 [%d/%d] seeds iniciadas (última: %s)", idx, total, url)
 
-                try:
-                    self.crawler.crawl(url, url_filter=url_filter)
-                except Exception as e:
-                    logger.error(f"Erro ao processar {url}: {e}")
+        allowed_netloc = urlparse(url).netloc
+        netloc_len = len(allowed_netloc)
 
-            QtCore.QMetaObject.invokeMethod(
-                self,
-                "on_crawling_complete",
-                QtCore.Qt.ConnectionType.QueuedConnection,
-                QtCore.Q_ARG(bool, True),
-                QtCore.Q_ARG(str, None)
-            )
+        def url_filter(candidate):
+            # Mesmo teste que urlparse(candidate).netloc == allowed_netloc para as URLs
+            # absolutas do crawler, sem reparsear cada link: o netloc vai de "://"
+            # até o primeiro '/', '?' ou '#'
+            _, sep, rest = candidate.partition('://')
+            return (sep == '://' and rest.startswith(allowed_netloc)
+                    and rest[netloc_len:netloc_len + 1] in ('', '/', '?', '#'))
 
+        try:
+            self.crawler.crawl(url, url_filter=url_filter)
         except Exception as e:
-            logger.error(f"Erro fatal no crawler: {e}")
-            QtCore.QMetaObject.invokeMethod(
-                self, "on_crawling_complete",
-                QtCore.Qt.ConnectionType.QueuedConnection,
-                QtCore.Q_ARG(bool, False),
-                QtCore.Q_ARG(str, str(e))
-            )
-        finally:
-            if self.crawler:
-                self.crawler.close()
+            logger.error("Erro ao processar %s: %s", url, e)
+
+    def _update_progress(self):
+        # Leitura dos contadores do crawler (ints) a cada tick: um setValue por tick
+        crawler = self.crawler
+        if crawler is not None:
+            done = crawler.pages_processed + crawler.pdfs_processed
+            self.progress.setValue(min(done, self.progress.maximum()))
+        # Rótulo reescrito só quando o texto muda, no mesmo ritmo do timer
+        text = f"Crawling em andamento... ({self._seeds_done}/{self._seeds_total} URLs iniciais)"
+        if text != self._progress_text:
+            self._progress_text = text
+            self.progress_label.setText(text)
 
     def stop_crawling(self):
         if self.is_running:
             self.is_running = False
+            self._stop.set()
             self.stop_button.setEnabled(False)
+            self.progress_label.setText("⏹ Parando crawling...")
             logger.info("⏹ Parando crawling...")
 
     @QtCore.pyqtSlot(bool, str)
@@ -506,11 +732,15 @@ class CrawlerGUI(QtWidgets.QWidget):
         self.is_running = False
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
+        self.clear_db_button.setEnabled(True)
         self.max_pages_spinbox.setEnabled(True)
         self.max_depth_spinbox.setEnabled(True)
+        self._progress_timer.stop()
         self.progress.setVisible(False)
 
-        if success:
+        if success and self._stop.is_set():
+            self.progress_label.setText("⏹ Crawling interrompido")
+        elif success:
             self.progress_label.setText("✅ Crawling concluído!")
             QtWidgets.QMessageBox.information(self, "Sucesso", "Crawling concluído!")
         else:
@@ -518,9 +748,7 @@ class CrawlerGUI(QtWidgets.QWidget):
             QtWidgets.QMessageBox.critical(self, "Erro", f"Erro: {error_msg}")
 
     def clear_log(self):
-        self.log_text.setReadOnly(False)
         self.log_text.clear()
-        self.log_text.setReadOnly(True)
 
     def export_text_output(self):
         if not TEXT_OUTPUT_FILE.exists():
@@ -531,16 +759,17 @@ class CrawlerGUI(QtWidgets.QWidget):
         )
         if file_path:
             try:
-                with open(TEXT_OUTPUT_FILE, "r", encoding="utf-8") as fin:
-                    data = fin.read()
-                with open(file_path, "w", encoding="utf-8") as fout:
-                    fout.write(data)
+                # Cópia em blocos (sendfile quando disponível): memória constante
+                shutil.copyfile(TEXT_OUTPUT_FILE, file_path)
                 QtWidgets.QMessageBox.information(self, "Exportado", f"Arquivo salvo em:\n{file_path}")
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao exportar:\n{e}")
 
 
 def main():
+    ensure_dirs()
+    setup_logging(LOG_FILE, level=logging.INFO)
+
     app = QtWidgets.QApplication(sys.argv)
     main_window = QtWidgets.QMainWindow()
 
@@ -569,7 +798,7 @@ def main():
         "Ajuda",
         "O aplicativo realiza crawling e scraping automático de URLs fornecidas.\n\n"
         "Ele gera os seguintes arquivos:\n"
-        "• Lista de URLs visitadas (crawled_urls.json)\n"
+        "• Lista de URLs visitadas (crawled_urls.db)\n"
         "• Texto coletado de todas as páginas (text_output.txt)\n"
         "• PDFs baixados na pasta 'pdfs/'\n\n"
         "Use a interface para adicionar URLs, configurar profundidade e páginas,\n"
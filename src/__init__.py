@@ -1,16 +1,25 @@
 """RAG Crawler - Sistema de crawling e extração de texto para RAG"""
+import importlib
+
 __version__ = '1.0.0'
 __author__ = 'Your Name'
 
-from .crawler import WebCrawler
-from .pdf_extractor import PDFExtractor
-from .scraper import HTMLScraper
-from .storage import URLStorage, TextStorage
+# Reexportações resolvidas no primeiro acesso (PEP 562): importar src.utils ou
+# src.storage não carrega o crawler, os parsers e o pypdfium2 junto
+_EXPORTS = {
+    'WebCrawler': '.crawler',
+    'HTMLScraper': '.scraper',
+    'PDFExtractor': '.pdf_extractor',
+    'URLStorage': '.storage',
+    'TextStorage': '.storage',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'WebCrawler',
-    'HTMLScraper',
-    'PDFExtractor',
-    'URLStorage',
-    'TextStorage'
-]
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,41 +1,71 @@
 """Crawler principal com scraping incremental e validação de URL completa"""
 
 import logging
+import multiprocessing
+import threading
 import time
 from collections import deque
-from typing import Set, Tuple, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Set, Tuple, Optional, Callable, Deque, Iterable, Dict, List
 from urllib.parse import urlparse
 
 from config.settings import (
-    DELAY_BETWEEN_REQUESTS, MAX_DEPTH, MAX_PAGES,
+    DELAY_BETWEEN_REQUESTS, MAX_DEPTH, MAX_PAGES, MAX_WORKERS, PDF_WORKERS, HTML_WORKERS,
     IGNORED_EXTENSIONS
 )
 from src.pdf_extractor import PDFExtractor
-from src.scraper import HTMLScraper
-from src.storage import URLStorage, TextStorage
-from src.utils import normalize_url, is_valid_url, format_file_size
+from src.scraper import HTMLScraper, NOT_MODIFIED
+from src.storage import URLStorage, TextStorage, FrontierStorage
+from src.utils import (
+    normalize_url, iter_filtered_links, format_file_size, create_http_session, url_key
+)
 
 logger = logging.getLogger(__name__)
 
+# URLs retiradas do frontier por consulta ao SQLite
+FRONTIER_BATCH = 256
 
-def url_starts_with_base(url: str, base_url: str) -> bool:
-    """Verifica se a URL começa com a URL base completa (incluindo subdomínio e caminho)"""
-    url_normalized = normalize_url(url)
-    base_normalized = normalize_url(base_url)
-    return url_normalized.startswith(base_normalized)
+# Os pools nascem de um processo com várias threads (GUI, listener de log, I/O):
+# fork copiaria locks presos por elas. forkserver/spawn partem de um processo limpo
+_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
 
 
 class WebCrawler:
     """Crawler principal com logs simplificados e scraping incremental"""
 
     def __init__(self, url_storage: URLStorage, text_storage: TextStorage,
-                 max_depth: int = MAX_DEPTH, max_pages: int = MAX_PAGES):
+                 max_depth: int = MAX_DEPTH, max_pages: int = MAX_PAGES,
+                 max_workers: int = MAX_WORKERS,
+                 frontier_storage: Optional[FrontierStorage] = None,
+                 stop_event: Optional[threading.Event] = None):
         self.url_storage = url_storage
         self.text_storage = text_storage
+        # Sem frontier persistente informado, a fila vive só em memória
+        self.frontier = frontier_storage or FrontierStorage(':memory:')
         self.max_depth = max_depth
         self.max_pages = max_pages
-        self.html_scraper = HTMLScraper()
-        self.pdf_extractor = PDFExtractor()
+        self.max_workers = max_workers
+        # Uma única sessão (pool keep-alive) para páginas e PDFs
+        self.session = create_http_session()
+        # Parsing de HTML também fora das threads de I/O, em processos próprios
+        self._html_pool = ProcessPoolExecutor(max_workers=HTML_WORKERS, mp_context=_MP_CONTEXT)
+        self.html_scraper = HTMLScraper(session=self.session, executor=self._html_pool)
+        # Parsing de PDF em processos separados (CPU-bound, fora do GIL das threads)
+        self._pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=_MP_CONTEXT)
+        self.pdf_extractor = PDFExtractor(session=self.session, executor=self._pdf_pool)
+
+        # Sinal de parada vindo da GUI; também interrompe as esperas de politeness
+        self.stop_event = stop_event or threading.Event()
+
+        # Storages e contadores são compartilhados entre as threads de trabalho
+        self._lock = threading.Lock()
+        # Próximo horário liberado por host (politeness por host, não global)
+        self._host_lock = threading.Lock()
+        self._next_request_at: Dict[str, float] = {}
+        # URLs em processamento por qualquer crawl (seeds simultâneas com bases sobrepostas)
+        self._in_flight: Set[str] = set()
 
         # Contadores incrementais
         self.pages_processed = self._count_processed_by_type('html')
@@ -44,12 +74,7 @@ class WebCrawler:
     def _count_processed_by_type(self, content_type: str) -> int:
         """Conta quantas URLs de um tipo específico já foram processadas"""
         try:
-            from tinydb import Query
-            q = Query()
-            count = len(self.url_storage.urls_table.search(
-                (q.content_type == content_type) & (q.status == 'success')
-            ))
-            return count
+            return self.url_storage.count_by_type(content_type, status='success')
         except Exception:
             return 0
 
@@ -60,14 +85,21 @@ class WebCrawler:
         """Inicia o crawling a partir de uma URL inicial.
 
         O crawling é incremental e restrito à base da URL informada,
-        mas também aceita um filtro de URL personalizado.
+        mas também aceita um filtro de URL personalizado. Pode ser chamado em
+        paralelo (threads distintas) para bases diferentes: o estado de cada crawl
+        é local, e contadores, storages e politeness por host são compartilhados.
         """
         start_url = normalize_url(start_url)
-        parsed_start = urlparse(start_url)
-        start_domain = parsed_start.netloc
 
-        queue = deque([(start_url, 0)])
-        visited = set()
+        # A fila fica no FrontierStorage; `queue` é só o lote retirado da vez
+        self.frontier.requeue(start_url)
+        queue: Deque[Tuple[str, int]] = deque()
+        # url_key (int de 64 bits) de tudo o que já foi agendado, não as strings completas;
+        # das concluídas basta a contagem, então não há um segundo conjunto
+        scheduled: Set[int] = set()
+        visited = 0
+        # Páginas gravadas por este crawl; os contadores da instância somam todas as seeds
+        stats = {'html': 0, 'pdf': 0}
 
         # Calcular páginas já processadas
         initial_html_count = self.pages_processed
@@ -77,134 +109,233 @@ class WebCrawler:
 
         logger.info(f"🚀 Iniciando crawl: {start_url}")
         logger.info(f"📊 Já processadas: {initial_html_count} HTMLs, {initial_pdf_count} PDFs")
-        logger.info(f"📊 Limite: {remaining_pages} páginas restantes | Profundidade: {self.max_depth}\n")
+        logger.info(f"📊 Limite: {remaining_pages} páginas restantes | Profundidade: {self.max_depth}")
+        resumed = self.frontier.pending_count(start_url)
+        if resumed:
+            logger.info(f"♻️  Retomando fila salva: {resumed} URLs no frontier")
+        logger.info("")
 
         # Processa URL inicial
         if not self.url_storage.is_processed(start_url):
             logger.info(f"📍 Processando URL inicial: {start_url}")
-            success, links = self._process_url(start_url, start_url, 0)
+            success, links = self._process_url(start_url, start_url, 0, stats)
+            scheduled.add(url_key(start_url))
             if success:
-                visited.add(start_url)
-                for link in links:
-                    normalized_link = normalize_url(link)
-                    if (normalized_link not in visited and
-                            url_starts_with_base(normalized_link, start_url) and
-                            (url_filter(normalized_link) if url_filter else True)):
-                        queue.append((normalized_link, 1))
-            if queue and queue[0][0] == start_url:
-                queue.popleft()
+                visited += 1
+                self._enqueue_links(start_url, links, scheduled, url_filter, 1)
         else:
             logger.info(f"ℹ️  URL inicial já foi processada anteriormente: {start_url}")
-            visited.add(start_url)
-            result = self.html_scraper.scrape_with_links(start_url)
-            if result:
-                _, links = result
-                for link in links:
-                    normalized_link = normalize_url(link)
-                    if (normalized_link not in visited and
-                            url_starts_with_base(normalized_link, start_url) and
-                            (url_filter(normalized_link) if url_filter else True)):
-                        queue.append((normalized_link, 1))
-
-        # Processar a fila
-        while queue and len(visited) < remaining_pages:
-            current_url, depth = queue.popleft()
-            normalized_url = normalize_url(current_url)
-
-            if normalized_url in visited or depth > self.max_depth:
-                continue
-            if self.url_storage.is_processed(normalized_url):
-                visited.add(normalized_url)
-                continue
-            if not url_starts_with_base(normalized_url, start_url):
-                continue
-            if url_filter and not url_filter(normalized_url):
-                continue
-
-            success, links = self._process_url(normalized_url, start_url, depth)
-
-            if success:
-                visited.add(normalized_url)
-                for link in links:
-                    normalized_link = normalize_url(link)
-                    if (normalized_link not in visited and
-                            url_starts_with_base(normalized_link, start_url) and
-                            (url_filter(normalized_link) if url_filter else True)):
-                        queue.append((normalized_link, depth + 1))
-
-            time.sleep(DELAY_BETWEEN_REQUESTS)
-            total_processed = self.pages_processed + self.pdfs_processed
-            if total_processed >= self.max_pages:
-                logger.info(f"\n⚠️  Limite de {self.max_pages} páginas atingido")
-                break
-
-        self._print_summary(initial_html_count, initial_pdf_count)
+            scheduled.add(url_key(start_url))
+            visited += 1
+            etag = last_modified = None
+            if resumed:
+                # GET condicional só vale se a fila salva existe: com um frontier vazio
+                # (ex.: o ':memory:' padrão num processo novo) um 304 não deixaria nada a fazer
+                with self._lock:
+                    etag, last_modified = self.url_storage.get_validators(start_url)
+            result = self.html_scraper.scrape_page(start_url, etag, last_modified)
+            if result is NOT_MODIFIED:
+                # Os links da página já estão no frontier desde a visita anterior
+                logger.info("ℹ️  URL inicial não mudou (304); usando a fila salva")
+            elif result:
+                _, links, _ = result
+                links = iter_filtered_links(links, start_url, IGNORED_EXTENSIONS)
+                self._enqueue_links(start_url, links, scheduled, url_filter, 1)
+
+        # Processar a fila com um pool de threads (I/O de rede sobreposto)
+        pending = {}
+        # Linhas do frontier já registradas no URLStorage, marcadas em lote como concluídas
+        finished: List[str] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                limit_reached = self.pages_processed + self.pdfs_processed >= self.max_pages
+                stopping = self.stop_event.is_set()
+                while (not limit_reached and not stopping and len(pending) < self.max_workers and
+                       visited + len(pending) < remaining_pages):
+                    if not queue:
+                        queue.extend(self.frontier.pop_batch(start_url, FRONTIER_BATCH))
+                        if not queue:
+                            break
+                    current_url, depth = queue.popleft()
+                    normalized_url = normalize_url(current_url)
+                    key = url_key(normalized_url)
+
+                    # Linhas descartadas só nesta execução (profundidade, filtro) seguem
+                    # retiradas: requeue() as devolve ao próximo crawl, que pode ter
+                    # max_depth ou filtro diferentes
+                    if key in scheduled or depth > self.max_depth:
+                        continue
+                    if self._is_processed(normalized_url):
+                        # Já contada em total_processed; não consome o limite desta execução
+                        scheduled.add(key)
+                        finished.append(current_url)
+                        continue
+                    # Prefixo contra a base normalizada (barras finais não alteram o teste)
+                    if (not normalized_url.startswith(start_url) or
+                            (url_filter and not url_filter(normalized_url))):
+                        continue
+
+                    scheduled.add(key)
+                    future = pool.submit(self._process_url, normalized_url, start_url, depth, stats)
+                    pending[future] = (current_url, normalized_url, depth)
+
+                if finished:
+                    self.frontier.mark_done(start_url, finished)
+                    finished.clear()
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row_url, url, depth = pending.pop(future)
+                    try:
+                        success, links = future.result()
+                    except Exception as e:
+                        logger.error(f"Erro ao processar {url}: {e}")
+                        continue
+                    # Interrompida (parada) ou ainda em outra seed: segue retirada e
+                    # volta à fila pelo requeue() do próximo crawl
+                    if self._is_processed(url):
+                        finished.append(row_url)
+                    if success:
+                        visited += 1
+                        self._enqueue_links(start_url, links, scheduled, url_filter, depth + 1)
+
+                if self.pages_processed + self.pdfs_processed >= self.max_pages and not limit_reached:
+                    # O restante segue salvo no frontier para o próximo crawl
+                    logger.info(f"\n⚠️  Limite de {self.max_pages} páginas atingido")
+                    queue.clear()
+
+        if self.stop_event.is_set():
+            # URLs retiradas e não visitadas voltam à fila via requeue() no próximo crawl
+            logger.info("\n⏹  Crawl interrompido")
+        self._print_summary(stats)
 
     # ==========================================================
     # MÉTODOS AUXILIARES
     # ==========================================================
-    def _process_url(self, url: str, base_url: str, depth: int) -> Tuple[bool, Set[str]]:
-        """Processa uma URL (HTML ou PDF)."""
-        if url.lower().endswith('.pdf'):
-            return self._process_pdf(url, depth), set()
-        else:
-            return self._process_html(url, base_url, depth)
+    def _enqueue_links(self, base_url: str, links: Iterable[str], seen: Set[int],
+                       url_filter: Optional[Callable[[str], bool]], depth: int):
+        """Grava no frontier, em uma transação, os links ainda não vistos.
+
+        Os links já chegam normalizados e restritos à base (ver iter_filtered_links);
+        o filtro roda aqui, na mesma passada que monta o lote.
+        """
+        batch = [(link, depth) for link in links
+                 if url_key(link) not in seen and (url_filter is None or url_filter(link))]
+        if batch:
+            self.frontier.push_many(base_url, batch)
 
-    def _process_html(self, url: str, base_url: str, depth: int) -> Tuple[bool, Set[str]]:
-        """Processa uma página HTML."""
-        if self.url_storage.is_processed(url):
-            return False, set()
+    def _wait_for_host(self, url: str) -> bool:
+        """Respeita DELAY_BETWEEN_REQUESTS entre requisições ao mesmo host.
+
+        Returns:
+            False se o crawl foi interrompido durante a espera
+        """
+        host = urlparse(url).netloc
+        with self._host_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_at.get(host, now))
+            self._next_request_at[host] = slot + DELAY_BETWEEN_REQUESTS
+        if slot > now:
+            return not self.stop_event.wait(slot - now)
+        return not self.stop_event.is_set()
+
+    def _process_url(self, url: str, base_url: str, depth: int,
+                     stats: Dict[str, int]) -> Tuple[bool, Iterable[str]]:
+        """Processa uma URL (HTML ou PDF)."""
+        if not self._claim(url):
+            return False, []
+        try:
+            if not self._wait_for_host(url):
+                return False, []
+            if url.lower().endswith('.pdf'):
+                return self._process_pdf(url, depth, stats), []
+            else:
+                return self._process_html(url, base_url, depth, stats)
+        finally:
+            with self._lock:
+                self._in_flight.discard(url)
+
+    def _claim(self, url: str) -> bool:
+        """Reserva a URL para esta thread se ninguém a processou nem está processando.
+
+        Verificação e reserva sob o mesmo lock das gravações: duas seeds cujas bases
+        se sobrepõem não baixam nem gravam a mesma página duas vezes.
+        """
+        with self._lock:
+            if url in self._in_flight or self.url_storage.is_processed(url):
+                return False
+            self._in_flight.add(url)
+            return True
 
-        result = self.html_scraper.scrape_with_links(url)
-        if result is None:
-            self.url_storage.mark_as_processed(url, status='error', content_type='html')
-            return False, set()
+    def _is_processed(self, url: str) -> bool:
+        """Consulta o URLStorage sem disputar o lock das escritas.
 
-        text, links = result
+        is_processed é um teste de pertinência no conjunto em memória do storage,
+        atômico sob o GIL; o conjunto só recebe add() sob self._lock. É só um
+        pré-filtro do agendamento: quem decide é _claim.
+        """
+        return self.url_storage.is_processed(url)
+
+    def _mark(self, url: str, status: str, content_type: str):
+        """Registra o status de uma URL de forma segura entre threads."""
+        with self._lock:
+            self.url_storage.mark_as_processed(url, status=status, content_type=content_type)
+
+    def _process_html(self, url: str, base_url: str, depth: int,
+                      stats: Dict[str, int]) -> Tuple[bool, Iterable[str]]:
+        """Processa uma página HTML (URL já reservada por _claim)."""
+        result = self.html_scraper.scrape_page(url)
+        if result is None or result is NOT_MODIFIED:
+            self._mark(url, 'error', 'html')
+            return False, []
+
+        text, links, validators = result
         if not text.strip():
-            self.url_storage.mark_as_processed(url, status='empty', content_type='html')
-            return False, links
+            self._mark(url, 'empty', 'html')
+            return False, []
 
-        self.text_storage.append_text(url, text, 'html')
-        self.url_storage.mark_as_processed(url, status='success', content_type='html')
-        self.pages_processed += 1
+        with self._lock:
+            self.text_storage.append_text(url, text, 'html')
+            self.url_storage.mark_as_processed(url, status='success', content_type='html',
+                                               **validators)
+            self.pages_processed += 1
+            stats['html'] += 1
+            count = self.pages_processed
 
         display_url = url if len(url) <= 80 else url[:77] + "..."
-        logger.info(f"✓ [{self.pages_processed:3d}] HTML | D{depth} | {len(text):>6,} chars | {display_url}")
-
-        valid_links = set()
-        for link in links:
-            if link.lower().endswith('.pdf') and url_starts_with_base(link, base_url):
-                valid_links.add(link)
-            elif (is_valid_url(link, IGNORED_EXTENSIONS) and
-                  url_starts_with_base(link, base_url)):
-                valid_links.add(link)
-        return True, valid_links
-
-    def _process_pdf(self, url: str, depth: int) -> bool:
-        """Processa um arquivo PDF."""
-        if self.url_storage.is_processed(url):
-            return False
+        logger.info("✓ [%3d] HTML | D%d | %6s chars | %s", count, depth, format(len(text), ','), display_url)
+
+        # Gerador: a filtragem é consumida direto por _enqueue_links, sem lista intermediária
+        return True, iter_filtered_links(links, base_url, IGNORED_EXTENSIONS)
 
+    def _process_pdf(self, url: str, depth: int, stats: Dict[str, int]) -> bool:
+        """Processa um arquivo PDF (URL já reservada por _claim)."""
         text = self.pdf_extractor.extract(url)
         if text is None or not text.strip():
-            self.url_storage.mark_as_processed(url, status='empty', content_type='pdf')
+            self._mark(url, 'empty', 'pdf')
             return False
 
-        self.text_storage.append_text(url, text, 'pdf')
-        self.url_storage.mark_as_processed(url, status='success', content_type='pdf')
-        self.pdfs_processed += 1
+        with self._lock:
+            self.text_storage.append_text(url, text, 'pdf')
+            self.url_storage.mark_as_processed(url, status='success', content_type='pdf')
+            self.pdfs_processed += 1
+            stats['pdf'] += 1
+            count = self.pdfs_processed
 
         display_url = url if len(url) <= 80 else url[:77] + "..."
-        logger.info(f"✓ [{self.pdfs_processed:3d}] PDF  | D{depth} | {len(text):>6,} chars | {display_url}")
+        logger.info("✓ [%3d] PDF  | D%d | %6s chars | %s", count, depth, format(len(text), ','), display_url)
         return True
 
-    def _print_summary(self, initial_html: int, initial_pdf: int):
+    def _print_summary(self, stats: Dict[str, int]):
         """Exibe resumo do crawling."""
-        total_urls = self.url_storage.get_processed_count()
-        file_size = self.text_storage.get_file_size()
-        new_html = self.pages_processed - initial_html
-        new_pdf = self.pdfs_processed - initial_pdf
+        with self._lock:
+            self.url_storage.flush()
+            total_urls = self.url_storage.get_processed_count()
+            file_size = self.text_storage.get_file_size()
+            new_html, new_pdf = stats['html'], stats['pdf']
 
         print()
         logger.info("─" * 70)
@@ -217,6 +348,7 @@ class WebCrawler:
     def export_text(self, export_path: str) -> bool:
         """Exporta todo o texto coletado para um arquivo externo em UTF-8."""
         try:
+            self.text_storage.flush()
             if not self.text_storage.output_file.exists():
                 logger.warning("⚠️  Nenhum texto disponível para exportar.")
                 return False
@@ -249,4 +381,15 @@ class WebCrawler:
         """Fecha todas as conexões e recursos."""
         self.html_scraper.close()
         self.pdf_extractor.close()
+        self._pdf_pool.shutdown()
+        self._html_pool.shutdown()
+        self.session.close()
         self.url_storage.close()
+        self.text_storage.close()
+        self.frontier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,94 +1,248 @@
 """Módulo simplificado de extração de texto de PDFs"""
+import contextlib
 import hashlib
 import logging
+import tempfile
+import threading
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-import pdfplumber
+import pypdfium2 as pdfium
 import requests
 
-from config.settings import HEADERS, TIMEOUT, PDF_DIR, MAX_PDF_SIZE_MB
-from .utils import clean_text
+from config.settings import (
+    TIMEOUT, PDF_DIR, MAX_PDF_SIZE_MB, SAVE_PDFS, PDF_WORKERS, PDF_SPLIT_MIN_PAGES,
+    PDF_SPLIT_MIN_MB
+)
+from .utils import clean_text, create_http_session
 
 logger = logging.getLogger(__name__)
 
+# O PDFium não é thread-safe; no pool de processos o lock nunca é disputado
+_PDFIUM_LOCK = threading.Lock()
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+def _source_name(pdf_source: Union[Path, bytes]) -> str:
+    """Nome usado nos logs para um PDF em disco ou em memória"""
+    return pdf_source.name if isinstance(pdf_source, Path) else "<memória>"
+
+
+def count_pages(pdf_source: Union[Path, bytes]) -> int:
+    """Número de páginas do PDF (0 se não puder ser aberto)
+
+    Roda no pool de processos, como extract_text_from_file: o lock do PDFium
+    nunca fica preso nas threads de I/O do crawler.
+    """
+    try:
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    except Exception:
+        return 0
+
+
+def extract_text_from_file(pdf_source: Union[Path, bytes], start: int = 0,
+                           stop: Optional[int] = None) -> str:
+    """Extrai texto de arquivo PDF
+
+    Função de módulo (picklable) para poder rodar em um ProcessPoolExecutor.
+
+    Args:
+        pdf_source: Caminho do arquivo PDF ou seus bytes em memória
+        start: Primeira página (índice 0)
+        stop: Página final, exclusiva (padrão: até o fim do documento)
+
+    Returns:
+        Texto extraído do PDF
+    """
+    try:
+        text_parts = []
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_source)
+            try:
+                n_pages = len(pdf)
+                for index in range(start, n_pages if stop is None else min(stop, n_pages)):
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    page_text = textpage.get_text_range()
+                    textpage.close()
+                    page.close()
+                    if page_text:
+                        text_parts.append(page_text)
+            finally:
+                pdf.close()
+
+        text = clean_text("\n\n".join(text_parts))
+        return text
+    except Exception as e:
+        logger.debug("Erro ao ler PDF: %s - %s", _source_name(pdf_source), e)
+        return ""
+
 
 class PDFExtractor:
     """Extrai texto de arquivos PDF"""
 
-    def __init__(self, pdf_dir: Path = PDF_DIR):
+    def __init__(self, pdf_dir: Path = PDF_DIR, session: Optional[requests.Session] = None,
+                 executor: Optional[Executor] = None, save_to_disk: bool = SAVE_PDFS):
         self.pdf_dir = pdf_dir
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+        # Sessão injetada é compartilhada e fechada por quem a criou
+        self._owns_session = session is None
+        self.session = session or create_http_session()
+        # Pool de processos opcional para o parsing (CPU-bound, preso ao GIL em threads)
+        self.executor = executor
+        self.save_to_disk = save_to_disk
 
-    def download_pdf(self, url: str) -> Optional[Path]:
-        """Baixa um PDF da URL
+    def fetch_pdf(self, url: str) -> Optional[bytes]:
+        """Baixa um PDF da URL direto para a memória
 
         Args:
             url: URL do PDF a ser baixado
 
         Returns:
-            Path do arquivo baixado ou None se falhar
+            Bytes do PDF ou None se falhar
         """
+        max_bytes = MAX_PDF_SIZE_MB * 1024 * 1024
         try:
-            response = self.session.get(url, timeout=TIMEOUT, stream=True, allow_redirects=True)
-            response.raise_for_status()
-            content_type = response.headers.get('Content-Type', '').lower()
-
-            if 'application/pdf' not in content_type:
-                logger.debug(f"Conteúdo não-PDF ignorado: {url} (tipo: {content_type})")
+            if not self._probe(url):
                 return None
 
-            # Verificar tamanho do arquivo
-            content_length = response.headers.get('Content-Length')
-            if content_length:
-                size_mb = int(content_length) / (1024 * 1024)
-                if size_mb > MAX_PDF_SIZE_MB:
-                    logger.debug(f"PDF muito grande ({size_mb:.1f}MB): {url}")
+            with self.session.get(url, timeout=TIMEOUT, stream=True, allow_redirects=True) as response:
+                response.raise_for_status()
+                if not self._accepts(url, response.headers):
                     return None
 
-            filename = self._generate_filename(url)
-            filepath = self.pdf_dir / filename
-
-            # Salvar PDF
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+                # Blocos guardados como vieram e unidos uma só vez, já no tamanho final
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    # Servidores sem Content-Length também respeitam o limite
+                    if size > max_bytes:
+                        logger.debug("PDF muito grande (>%sMB): %s", MAX_PDF_SIZE_MB, url)
+                        return None
 
-            return filepath
+                return b"".join(chunks)
         except requests.exceptions.RequestException as e:
-            logger.debug(f"Falha ao baixar PDF: {url} - Erro: {str(e)}")
+            logger.debug("Falha ao baixar PDF: %s - Erro: %s", url, e)
             return None
         except Exception as e:
-            logger.debug(f"Erro inesperado ao baixar PDF: {url} - {str(e)}")
+            logger.debug("Erro inesperado ao baixar PDF: %s - %s", url, e)
             return None
 
-    def extract_text_from_file(self, pdf_path: Path) -> str:
+    def _probe(self, url: str) -> bool:
+        """Consulta os cabeçalhos via HEAD antes de baixar o corpo
+
+        Só descarta a URL quando o HEAD responde com sucesso e os cabeçalhos
+        não servem; servidores sem HEAD (405) ou com erro seguem para o GET,
+        que refaz a mesma verificação.
+
+        Args:
+            url: URL do PDF
+
+        Returns:
+            False se a URL certamente não é um PDF aceitável
+        """
+        try:
+            response = self.session.head(url, timeout=TIMEOUT, allow_redirects=True)
+        except requests.exceptions.RequestException:
+            return True
+        if not response.ok:
+            return True
+        return self._accepts(url, response.headers)
+
+    @staticmethod
+    def _accepts(url: str, headers) -> bool:
+        """Verifica tipo e tamanho do PDF pelos cabeçalhos da resposta"""
+        content_type = headers.get('Content-Type', '').lower()
+        if 'application/pdf' not in content_type:
+            logger.debug("Conteúdo não-PDF ignorado: %s (tipo: %s)", url, content_type)
+            return False
+
+        # Verificar tamanho do arquivo
+        content_length = headers.get('Content-Length')
+        if content_length and content_length.isdigit():
+            size_mb = int(content_length) / (1024 * 1024)
+            if size_mb > MAX_PDF_SIZE_MB:
+                logger.debug("PDF muito grande (%.1fMB): %s", size_mb, url)
+                return False
+        return True
+
+    def download_pdf(self, url: str) -> Optional[Path]:
+        """Baixa um PDF da URL
+
+        Args:
+            url: URL do PDF a ser baixado
+
+        Returns:
+            Path do arquivo baixado ou None se falhar
+        """
+        data = self.fetch_pdf(url)
+        if data is None:
+            return None
+        return self._save(url, data)
+
+    def extract_text_from_file(self, pdf_source: Union[Path, bytes]) -> str:
         """Extrai texto de arquivo PDF
 
         Args:
-            pdf_path: Caminho do arquivo PDF
+            pdf_source: Caminho do arquivo PDF ou seus bytes em memória
 
         Returns:
             Texto extraído do PDF
         """
+        if self.executor is None:
+            return extract_text_from_file(pdf_source)
         try:
-            text_parts = []
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-
-            text = clean_text("\n\n".join(text_parts))
-            return text
+            size = (pdf_source.stat().st_size if isinstance(pdf_source, Path)
+                    else len(pdf_source))
+            if size < PDF_SPLIT_MIN_MB * 1024 * 1024:
+                return self.executor.submit(extract_text_from_file, pdf_source).result()
+            # PDF grande: as tarefas recebem um caminho, não uma cópia dos bytes cada uma;
+            # as páginas são contadas no próprio pool
+            with self._as_file(pdf_source) as path:
+                ranges = self._page_ranges(self.executor.submit(count_pages, path).result())
+                # Faixas de páginas em processos distintos, na ordem original.
+                # clean_text reduz todo espaço em branco a ' ', então juntar as partes
+                # limpas com ' ' dá o mesmo texto que limpar o documento inteiro
+                futures = [self.executor.submit(extract_text_from_file, path, start, stop)
+                           for start, stop in ranges]
+                return ' '.join(part for part in (f.result() for f in futures) if part)
         except Exception as e:
-            logger.debug(f"Erro ao ler PDF: {pdf_path.name} - {str(e)}")
+            logger.debug("Erro no pool de extração de PDF: %s - %s", _source_name(pdf_source), e)
             return ""
 
+    @staticmethod
+    @contextlib.contextmanager
+    def _as_file(pdf_source: Union[Path, bytes]):
+        """Caminho do PDF em disco; bytes vão para um arquivo temporário, gravado uma vez"""
+        if isinstance(pdf_source, Path):
+            yield pdf_source
+            return
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            tmp.write(pdf_source)
+        path = Path(tmp.name)
+        try:
+            yield path
+        finally:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _page_ranges(n_pages: int) -> List[Tuple[int, int]]:
+        """Divide n_pages em até PDF_WORKERS faixas de ao menos PDF_SPLIT_MIN_PAGES"""
+        chunks = min(PDF_WORKERS, n_pages // PDF_SPLIT_MIN_PAGES)
+        if chunks <= 1:
+            return [(0, n_pages)]
+        step = -(-n_pages // chunks)
+        return [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+
     def extract(self, url: str) -> Optional[str]:
         """Extrai texto diretamente de uma URL PDF
 
@@ -98,13 +252,34 @@ class PDFExtractor:
         Returns:
             Texto extraído ou None se falhar
         """
-        pdf_path = self.download_pdf(url)
-        if not pdf_path:
+        data = self.fetch_pdf(url)
+        if not data:
             return None
 
-        text = self.extract_text_from_file(pdf_path)
+        # O parsing usa os bytes já em memória; o disco é só uma cópia opcional.
+        # Já gravado, o arquivo serve de fonte e PDFs grandes dispensam o temporário
+        saved = self._save(url, data) if self.save_to_disk else None
+        text = self.extract_text_from_file(saved if saved is not None else data)
         return text if text else None
 
+    def _save(self, url: str, data: bytes) -> Optional[Path]:
+        """Grava os bytes do PDF em pdf_dir
+
+        Args:
+            url: URL do PDF (define o nome do arquivo)
+            data: Conteúdo do PDF
+
+        Returns:
+            Path do arquivo gravado ou None se falhar
+        """
+        filepath = self.pdf_dir / self._generate_filename(url)
+        try:
+            filepath.write_bytes(data)
+            return filepath
+        except OSError as e:
+            logger.debug("Erro ao salvar PDF: %s - %s", filepath.name, e)
+            return None
+
     def _generate_filename(self, url: str) -> str:
         """Gera nome de arquivo único para o PDF
 
@@ -114,7 +289,7 @@ class PDFExtractor:
         Returns:
             Nome de arquivo único
         """
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:10]
+        url_hash = hashlib.blake2b(url.encode(), digest_size=5).hexdigest()
         path = Path(urlparse(url).path).stem
         base_name = path if path and len(path) < 50 else "document"
         # Sanitizar nome do arquivo
@@ -123,4 +298,5 @@ class PDFExtractor:
 
     def close(self):
         """Fecha a sessão HTTP"""
-        self.session.close()
+        if self._owns_session:
+            self.session.close()
@@ -1,43 +1,116 @@
 """Módulo de scraping HTML com logs enxutos para RAG"""
 
 import logging
+from concurrent.futures import Executor
 from typing import Optional, Tuple, Set
 from urllib.parse import urljoin
 
+import lxml.html
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 
-from config.settings import HEADERS, TIMEOUT
-from .utils import clean_text
+from config.settings import TIMEOUT
+from .utils import clean_text, create_http_session
 
 logger = logging.getLogger(__name__)
 
+# Elementos descartados antes da extração de texto (comentários incluídos)
+REMOVED_ELEMENTS = (
+    etree.Comment, etree.ProcessingInstruction,
+    'script', 'style', 'nav', 'footer', 'header', 'aside', 'noscript', 'iframe'
+)
+LINK_XPATH = etree.XPath('//a/@href', smart_strings=False)
+
+# Retorno de fetch_page/scrape_page quando o servidor responde 304
+NOT_MODIFIED = object()
+
+
+def parse_page(html_content: bytes, url: str) -> Tuple[str, Set[str]]:
+    """Extrai texto limpo e links do HTML com um único parse (lxml)
+
+    Função de módulo (picklable) para poder rodar em um ProcessPoolExecutor.
+
+    Args:
+        html_content: Conteúdo HTML em bytes
+        url: URL da página (base para links relativos e logging)
+
+    Returns:
+        Tupla (texto_limpo, conjunto_de_links)
+    """
+    try:
+        root = lxml.html.document_fromstring(html_content)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug("Erro ao interpretar HTML: %s - %s", url, e)
+        return "", set()
+
+    # Links são coletados antes da remoção de nav/header/footer
+    links = HTMLScraper._links_from_root(root, url)
+    return HTMLScraper._text_from_root(root), links
+
 
 class HTMLScraper:
     """Classe para extrair texto e links de páginas HTML"""
 
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
+    def __init__(self, session: Optional[requests.Session] = None,
+                 executor: Optional[Executor] = None):
+        # Sessão injetada é compartilhada e fechada por quem a criou
+        self._owns_session = session is None
+        self.session = session or create_http_session()
+        # Pool de processos opcional para o parsing (CPU-bound, preso ao GIL em threads)
+        self.executor = executor
 
-    def fetch_page(self, url: str) -> Optional[Tuple[bytes, str]]:
+    def fetch_page(self, url: str, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None):
         """Busca o conteúdo HTML de uma URL
 
         Args:
             url: URL da página a ser buscada
+            etag: ETag da visita anterior (envia If-None-Match)
+            last_modified: Last-Modified da visita anterior (envia If-Modified-Since)
 
         Returns:
-            Tupla (conteúdo_bytes, tipo_conteúdo) ou None se falhar
+            Tupla (conteúdo_bytes, tipo_conteúdo, validadores), NOT_MODIFIED
+            se a página não mudou, ou None se falhar
         """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
         try:
-            response = self.session.get(url, timeout=TIMEOUT, allow_redirects=True)
+            response = self.session.get(url, timeout=TIMEOUT, allow_redirects=True,
+                                        headers=headers or None)
+            if response.status_code == 304:
+                return NOT_MODIFIED
             response.raise_for_status()
             content_type = response.headers.get('Content-Type', '').lower()
-            return response.content, content_type
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            return response.content, content_type, validators
         except requests.exceptions.RequestException as e:
-            logger.debug(f"Falha ao acessar: {url} - Erro: {str(e)}")
+            logger.debug("Falha ao acessar: %s - Erro: %s", url, e)
             return None
 
+    def parse_page(self, html_content: bytes, url: str) -> Tuple[str, Set[str]]:
+        """Extrai texto limpo e links do HTML com um único parse (lxml)
+
+        Args:
+            html_content: Conteúdo HTML em bytes
+            url: URL da página (base para links relativos e logging)
+
+        Returns:
+            Tupla (texto_limpo, conjunto_de_links)
+        """
+        if self.executor is None:
+            return parse_page(html_content, url)
+        try:
+            return self.executor.submit(parse_page, html_content, url).result()
+        except Exception as e:
+            logger.debug("Erro no pool de parsing HTML: %s - %s", url, e)
+            return "", set()
+
     def extract_text(self, html_content: bytes, url: str) -> str:
         """Extrai e limpa texto de HTML
 
@@ -49,17 +122,9 @@ class HTMLScraper:
             Texto limpo extraído do HTML
         """
         try:
-            soup = BeautifulSoup(html_content, 'lxml')
-
-            # Remove elementos indesejados
-            for element in soup(['script', 'style', 'nav', 'footer', 'header',
-                                 'aside', 'noscript', 'iframe']):
-                element.decompose()
-
-            text = clean_text(soup.get_text(separator='\n'))
-            return text
+            return self._text_from_root(lxml.html.document_fromstring(html_content))
         except Exception as e:
-            logger.debug(f"Erro ao extrair texto: {url} - {str(e)}")
+            logger.debug("Erro ao extrair texto: %s - %s", url, e)
             return ""
 
     def extract_links(self, html_content: bytes, base_url: str) -> Set[str]:
@@ -72,22 +137,28 @@ class HTMLScraper:
         Returns:
             Conjunto de URLs absolutas encontradas
         """
-        links = set()
         try:
-            soup = BeautifulSoup(html_content, 'lxml')
-            for tag in soup.find_all('a', href=True):
-                href = tag['href']
-                # Converter para URL absoluta
-                absolute_url = urljoin(base_url, href)
-                # Remover fragmentos (#)
-                absolute_url = absolute_url.split('#')[0]
-                if absolute_url:
-                    links.add(absolute_url)
-            return links
+            return self._links_from_root(lxml.html.document_fromstring(html_content), base_url)
         except Exception as e:
-            logger.debug(f"Erro ao extrair links: {base_url} - {str(e)}")
+            logger.debug("Erro ao extrair links: %s - %s", base_url, e)
             return set()
 
+    @staticmethod
+    def _text_from_root(root) -> str:
+        """Remove elementos indesejados e retorna o texto limpo da árvore"""
+        etree.strip_elements(root, *REMOVED_ELEMENTS, with_tail=False)
+        return clean_text('\n'.join(root.itertext()))
+
+    @staticmethod
+    def _links_from_root(root, base_url: str) -> Set[str]:
+        """Converte os href da árvore em URLs absolutas sem fragmento"""
+        links = set()
+        for href in LINK_XPATH(root):
+            absolute_url = urljoin(base_url, href).split('#')[0]
+            if absolute_url:
+                links.add(absolute_url)
+        return links
+
     def scrape_with_links(self, url: str) -> Optional[Tuple[str, Set[str]]]:
         """Busca HTML, extrai texto e links
 
@@ -97,19 +168,37 @@ class HTMLScraper:
         Returns:
             Tupla (texto, conjunto_de_links) ou None se falhar
         """
-        result = self.fetch_page(url)
-        if not result:
+        result = self.scrape_page(url)
+        if result is NOT_MODIFIED or not result:
             return None
+        return result[:2]
+
+    def scrape_page(self, url: str, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None):
+        """Como scrape_with_links, com GET condicional e validadores HTTP
+
+        Args:
+            url: URL da página a ser processada
+            etag: ETag da visita anterior
+            last_modified: Last-Modified da visita anterior
+
+        Returns:
+            Tupla (texto, conjunto_de_links, validadores), NOT_MODIFIED se a
+            página não mudou, ou None se falhar
+        """
+        result = self.fetch_page(url, etag, last_modified)
+        if result is NOT_MODIFIED or not result:
+            return result
 
-        content, content_type = result
+        content, content_type, validators = result
         if 'text/html' not in content_type:
-            logger.debug(f"Conteúdo não-HTML ignorado: {url} (tipo: {content_type})")
+            logger.debug("Conteúdo não-HTML ignorado: %s (tipo: %s)", url, content_type)
             return None
 
-        text = self.extract_text(content, url)
-        links = self.extract_links(content, url)
-        return text, links
+        text, links = self.parse_page(content, url)
+        return text, links, validators
 
     def close(self):
         """Fecha a sessão HTTP"""
-        self.session.close()
+        if self._owns_session:
+            self.session.close()
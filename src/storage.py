@@ -1,75 +1,267 @@
+import json
 import logging
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-
-from tinydb import TinyDB, Query
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
 
 class URLStorage:
-    """Gerencia o armazenamento e rastreamento de URLs processadas"""
+    """Gerencia o armazenamento e rastreamento de URLs processadas (SQLite)"""
+
+    UPSERT_SQL = (
+        'INSERT INTO urls (url, status, content_type, processed_at, error, etag, last_modified) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?) '
+        'ON CONFLICT(url) DO UPDATE SET status = excluded.status, '
+        'content_type = excluded.content_type, '
+        'processed_at = excluded.processed_at, error = excluded.error, '
+        'etag = excluded.etag, last_modified = excluded.last_modified'
+    )
+
+    def __init__(self, db_path: Path, flush_threshold: int = 1024):
+        db_path = Path(db_path)
+        # Instalações antigas guardavam o histórico no TinyDB (crawled_urls.json)
+        legacy_json = db_path.with_suffix('.json')
+        migrate = not db_path.exists() and legacy_json.exists()
+        # O crawler acessa o storage a partir de várias threads (sob lock próprio)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS urls ('
+            'url TEXT PRIMARY KEY, status TEXT, content_type TEXT, '
+            'processed_at TEXT, error TEXT, etag TEXT, last_modified TEXT)'
+        )
+        # Bancos criados antes dos validadores HTTP ganham as colunas novas
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(urls)')}
+        for column in ('etag', 'last_modified'):
+            if column not in columns:
+                self.db.execute(f'ALTER TABLE urls ADD COLUMN {column} TEXT')
+        self.db.commit()
+        if migrate:
+            self._import_legacy_json(legacy_json)
 
-    def __init__(self, db_path: Path):
-        self.db = TinyDB(db_path)
-        self.urls_table = self.db.table('urls')
+        # Registros ainda não gravados, gravados em lote por flush()
+        self.flush_threshold = flush_threshold
+        self._buffer: Dict[str, Tuple] = {}
+        # Todas as URLs conhecidas em memória: is_processed não toca no banco
+        self._known: Set[str] = set(self.get_all_processed_urls())
+
+    def _import_legacy_json(self, json_path: Path):
+        """Importa os registros do antigo banco TinyDB para não recrawlear tudo"""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                tables = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Não foi possível importar %s: %s", json_path, e)
+            return
+
+        rows = []
+        # Layout do TinyDB: {tabela: {doc_id: registro}}
+        for table in tables.values():
+            if not isinstance(table, dict):
+                continue
+            for item in table.values():
+                if isinstance(item, dict) and item.get('url'):
+                    rows.append((item['url'], item.get('status', 'success'),
+                                 item.get('content_type', 'html'), item.get('processed_at'),
+                                 item.get('error')))
+        with self.db:
+            self.db.executemany(
+                'INSERT OR IGNORE INTO urls (url, status, content_type, processed_at, error) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        # Renomeado para não ser importado de novo quando o .db for apagado (Limpar Base)
+        migrated = json_path.with_name(json_path.name + '.migrated')
+        json_path.replace(migrated)
+        logger.info("Importadas %d URLs de %s (arquivo renomeado para %s)",
+                    len(rows), json_path, migrated.name)
 
     def is_processed(self, url: str) -> bool:
-        URLQuery = Query()
-        return self.urls_table.search(URLQuery.url == url) != []
+        return url in self._known
 
     def mark_as_processed(self, url: str, status: str = 'success',
-                          content_type: str = 'html', error: Optional[str] = None):
-        URLQuery = Query()
-        data = {
-            'url': url,
-            'status': status,
-            'content_type': content_type,
-            'processed_at': datetime.now().isoformat(),
-            'error': error
-        }
-
-        if self.is_processed(url):
-            self.urls_table.update(data, URLQuery.url == url)
-        else:
-            self.urls_table.insert(data)
+                          content_type: str = 'html', error: Optional[str] = None,
+                          etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self._buffer[url] = (url, status, content_type, datetime.now().isoformat(), error,
+                             etag, last_modified)
+        self._known.add(url)
+        if len(self._buffer) >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Grava os registros pendentes em uma única transação"""
+        if not self._buffer:
+            return
+        with self.db:
+            self.db.executemany(self.UPSERT_SQL, list(self._buffer.values()))
+        self._buffer.clear()
+
+    def get_validators(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Retorna (ETag, Last-Modified) gravados para a URL, para GET condicional"""
+        record = self._buffer.get(url)
+        if record is not None:
+            return record[5], record[6]
+        row = self.db.execute(
+            'SELECT etag, last_modified FROM urls WHERE url = ?', (url,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
 
     def get_processed_count(self) -> int:
-        return len(self.urls_table)
+        self.flush()
+        return self.db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
 
     def get_success_count(self) -> int:
-        URLQuery = Query()
-        return len(self.urls_table.search(URLQuery.status == 'success'))
+        return self.count_by_type(status='success')
+
+    def count_by_type(self, content_type: Optional[str] = None, status: str = 'success') -> int:
+        """Conta URLs com o status informado, opcionalmente filtrando pelo tipo de conteúdo"""
+        self.flush()
+        if content_type is None:
+            query, params = 'SELECT COUNT(*) FROM urls WHERE status = ?', (status,)
+        else:
+            query = 'SELECT COUNT(*) FROM urls WHERE status = ? AND content_type = ?'
+            params = (status, content_type)
+        return self.db.execute(query, params).fetchone()[0]
 
     def get_all_processed_urls(self) -> list:
-        return [item['url'] for item in self.urls_table.all()]
+        self.flush()
+        return [row[0] for row in self.db.execute('SELECT url FROM urls')]
 
     def close(self):
+        self.flush()
         self.db.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrontierStorage:
+    """Fila BFS de URLs a visitar persistida em SQLite (sobrevive a reinícios)
+
+    Cada URL entra uma única vez por base de crawl; as linhas não são apagadas,
+    para que reinserções sejam ignoradas. popped: 0 pendente, 1 retirada (em
+    andamento), 2 concluída.
+    Seguro entre threads: crawls de bases diferentes compartilham a conexão.
+    """
+
+    def __init__(self, db_path: Union[Path, str]):
+        # Serializa as transações feitas sobre a conexão compartilhada
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS frontier ('
+            'base TEXT, url TEXT, depth INTEGER, popped INTEGER DEFAULT 0, '
+            'PRIMARY KEY (base, url))'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS frontier_pending ON frontier (base, popped, depth)')
+        self.db.commit()
+
+    def push_many(self, base: str, urls_depths: Iterable[Tuple[str, int]]):
+        """Enfileira vários (url, profundidade) em uma única transação"""
+        with self._lock, self.db:
+            self.db.executemany(
+                'INSERT OR IGNORE INTO frontier (base, url, depth) VALUES (?, ?, ?)',
+                ((base, url, depth) for url, depth in urls_depths)
+            )
+
+    def pop_batch(self, base: str, n: int) -> List[Tuple[str, int]]:
+        """Retira até n URLs pendentes, menor profundidade primeiro (ordem BFS)"""
+        with self._lock, self.db:
+            rows = self.db.execute(
+                'SELECT rowid, url, depth FROM frontier WHERE base = ? AND popped = 0 '
+                'ORDER BY depth, rowid LIMIT ?', (base, n)
+            ).fetchall()
+            self.db.executemany('UPDATE frontier SET popped = 1 WHERE rowid = ?',
+                                ((row[0],) for row in rows))
+        return [(url, depth) for _, url, depth in rows]
+
+    def mark_done(self, base: str, urls: Iterable[str]):
+        """Marca como concluídas URLs retiradas, para que requeue() não as devolva"""
+        with self._lock, self.db:
+            self.db.executemany(
+                'UPDATE frontier SET popped = 2 WHERE base = ? AND url = ?',
+                ((base, url) for url in urls)
+            )
+
+    def requeue(self, base: str):
+        """Devolve à fila as URLs retiradas e não concluídas de uma base
+
+        Chamado no início de um crawl: só o que estava em andamento quando o
+        processo parou volta a ser visitado; as linhas concluídas (mark_done)
+        ficam de fora, então o custo é proporcional ao que restou.
+        """
+        with self._lock, self.db:
+            self.db.execute('UPDATE frontier SET popped = 0 WHERE base = ? AND popped = 1', (base,))
+
+    def pending_count(self, base: str) -> int:
+        with self._lock:
+            return self.db.execute(
+                'SELECT COUNT(*) FROM frontier WHERE base = ? AND popped = 0', (base,)
+            ).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 class TextStorage:
     """Gerencia o armazenamento incremental de texto extraído"""
 
+    BUFFER_SIZE = 1 << 20  # 1 MiB
+
     def __init__(self, output_file: Path):
         self.output_file = output_file
+        # Aberto no primeiro append e mantido aberto até close()
+        self._fh = None
 
     def append_text(self, url: str, text: str, content_type: str = 'html'):
         if not text or not text.strip():
             return
 
-        with open(self.output_file, 'a', encoding='utf-8') as f:
-            separator = "\n" + "=" * 80 + "\n"
-            f.write(separator)
-            f.write(f"URL: {url}\n")
-            f.write(f"Tipo: {content_type}\n")
-            f.write(f"Extraído em: {datetime.now().isoformat()}\n")
-            f.write(separator)
-            f.write(text.strip())
-            f.write("\n\n")
+        if self._fh is None:
+            self._fh = open(self.output_file, 'a', encoding='utf-8', buffering=self.BUFFER_SIZE)
+
+        separator = "\n" + "=" * 80 + "\n"
+        self._fh.write(
+            f"{separator}URL: {url}\nTipo: {content_type}\n"
+            f"Extraído em: {datetime.now().isoformat()}\n{separator}"
+            f"{text.strip()}\n\n"
+        )
+
+    def flush(self):
+        """Descarrega o buffer de escrita no arquivo"""
+        if self._fh is not None:
+            self._fh.flush()
 
     def get_file_size(self) -> int:
+        self.flush()
         if self.output_file.exists():
             return self.output_file.stat().st_size
         return 0
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
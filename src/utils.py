@@ -1,47 +1,134 @@
 """Funções utilitárias"""
+import atexit
+import hashlib
 import logging
+import queue
 import re
+from functools import lru_cache
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
 from pathlib import Path
-from typing import Set
-from urllib.parse import urlparse, urljoin, urldefrag
+from typing import FrozenSet, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit, urljoin, urldefrag
 
-from bs4 import BeautifulSoup
+import lxml.html
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from config.settings import (
+    HEADERS, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_MAX_RETRIES
+)
 
 logger = logging.getLogger(__name__)
 
+# Regex de limpeza de texto, compiladas uma única vez
+_WHITESPACE_RE = re.compile(r'\s+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+# XPath de links compilado uma vez; smart_strings=False devolve str simples
+_LINK_XPATH = etree.XPath('//a/@href', smart_strings=False)
+
+# Entradas memoizadas de normalize_url (por processo)
+NORMALIZE_CACHE_SIZE = 131072
+
+# Capacidade da fila de logs; cheia, os registros mais antigos são descartados
+LOG_QUEUE_SIZE = 10000
+# Registros acumulados antes de cada escrita no arquivo de log (ERROR grava na hora)
+LOG_FILE_BUFFER = 512
+_log_listener: Optional[QueueListener] = None
 
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_url(url: str) -> str:
     """Normaliza uma URL removendo fragmentos e trailing slashes
 
+    Memoizada: os mesmos links (menus, rodapés) reaparecem em quase toda página
+    e passam por aqui na extração, na filtragem e ao sair do frontier.
+
     Args:
         url: URL a ser normalizada
 
     Returns:
         URL normalizada
     """
-    url, _ = urldefrag(url)
-    url = url.rstrip('/')
-    return url
+    if '#' in url:
+        url, _ = urldefrag(url)
+    return url.rstrip('/')
+
+
+def url_key(url: str) -> int:
+    """Chave inteira de 64 bits de uma URL já normalizada
+
+    Conjuntos de chaves ocupam uma fração da memória de conjuntos de strings;
+    colisões em 64 bits são desprezíveis para o volume de um crawl.
+
+    Args:
+        url: URL normalizada
+
+    Returns:
+        Hash blake2b de 8 bytes como inteiro
+    """
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), 'big')
 
 
-def is_valid_url(url: str, ignored_extensions: Set[str]) -> bool:
-    """Verifica se a URL é válida e não deve ser ignorada
+def iter_filtered_links(links: Iterable[str], base_prefix: str,
+                        ignored_extensions: FrozenSet[str]) -> Iterator[str]:
+    """Normaliza e filtra links em uma única passada, sob demanda
+
+    Normaliza cada link, mantém só os que começam com a base e descarta as
+    extensões ignoradas, com um único parse por link. O esquema http(s) fica garantido pelo prefixo, já
+    que a base é uma URL http(s) normalizada.
 
     Args:
-        url: URL a ser validada
+        links: Links absolutos
+        base_prefix: URL base já normalizada
         ignored_extensions: Conjunto de extensões a ignorar
 
+    Yields:
+        URLs normalizadas dentro da base
+    """
+    for link in links:
+        url = normalize_url(link)
+        if not url.startswith(base_prefix):
+            continue
+        path = urlsplit(url).path
+        dot = path.rfind('.')
+        if dot != -1 and path[dot:].lower() in ignored_extensions:
+            continue
+        yield url
+
+
+def filter_links(links: Iterable[str], base_prefix: str,
+                 ignored_extensions: FrozenSet[str]) -> List[str]:
+    """Versão em lista de iter_filtered_links
+
     Returns:
-        True se a URL for válida, False caso contrário
+        Lista de URLs normalizadas dentro da base
     """
-    if not url or not url.startswith(('http://', 'https://')):
-        return False
+    return list(iter_filtered_links(links, base_prefix, ignored_extensions))
 
-    path = urlparse(url).path.lower()
-    if any(path.endswith(ext) for ext in ignored_extensions):
-        return False
 
-    return True
+def create_http_session() -> requests.Session:
+    """Cria uma sessão HTTP com pool de conexões keep-alive e retentativas
+
+    Returns:
+        Sessão configurada com os headers padrão
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    # Anuncia só as codificações que o urllib3 sabe decodificar aqui
+    # (gzip/deflate sempre; br com brotli instalado, zstd com zstandard)
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=Retry(total=HTTP_MAX_RETRIES, backoff_factor=0.3,
+                          status_forcelist=(500, 502, 503, 504))
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 
 def clean_text(text: str) -> str:
@@ -57,9 +144,9 @@ def clean_text(text: str) -> str:
         return ""
 
     # Substituir múltiplos espaços por um único espaço
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     # Substituir múltiplas quebras de linha por no máximo duas
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
     # Remover espaços no início e fim
     text = text.strip()
 
@@ -82,17 +169,80 @@ def format_file_size(size_bytes: int) -> str:
     return f"{size_bytes:.2f} TB"
 
 
+class _DropOldestQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia: com a fila cheia, descarta o registro mais antigo"""
+
+    def prepare(self, record):
+        # A fila é local ao processo: o registro segue intacto e a interpolação
+        # de msg % args fica toda na thread do listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(record)
+
+
+def _stop_log_listener():
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            # MemoryHandler.close() descarrega o buffer mas não fecha o alvo
+            target = getattr(handler, 'target', None)
+            handler.close()
+            if target is not None:
+                target.close()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
+
+
+def add_log_handler(handler: logging.Handler):
+    """Inclui um handler entre os consumidos pela thread do QueueListener
+
+    Formatação e escrita desse handler passam a ocorrer no listener, nunca
+    nas threads que registram o log.
+
+    Args:
+        handler: Handler a adicionar
+    """
+    global _log_listener
+    if _log_listener is None:
+        logging.getLogger().addHandler(handler)
+        return
+    if handler in _log_listener.handlers:
+        return
+    # Os handlers do QueueListener são fixos: recria o listener na mesma fila
+    _log_listener.stop()
+    _log_listener = QueueListener(_log_listener.queue, *_log_listener.handlers, handler,
+                                  respect_handler_level=True)
+    _log_listener.start()
+
+
 def setup_logging(log_file: Path, level: int = logging.INFO):
     """Configura o sistema de logging com formato limpo
 
+    As threads do crawler só enfileiram os registros; a escrita em arquivo e
+    console acontece na thread de um QueueListener.
+
     Args:
         log_file: Caminho do arquivo de log
         level: Nível de logging (padrão: INFO)
     """
-    # Remove handlers existentes
+    global _log_listener
+
+    # Remove handlers existentes (e o listener de uma configuração anterior)
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
+    _stop_log_listener()
 
     # Formato simplificado
     formatter = logging.Formatter('%(message)s')
@@ -102,6 +252,9 @@ def setup_logging(log_file: Path, level: int = logging.INFO):
     file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_formatter)
     file_handler.setLevel(level)
+    buffered_file_handler = MemoryHandler(LOG_FILE_BUFFER, flushLevel=logging.ERROR,
+                                          target=file_handler)
+    buffered_file_handler.setLevel(level)
 
     # Handler para console (simplificado)
     console_handler = logging.StreamHandler()
@@ -109,9 +262,12 @@ def setup_logging(log_file: Path, level: int = logging.INFO):
     console_handler.setLevel(level)
 
     # Configurar logger raiz
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _log_listener = QueueListener(log_queue, buffered_file_handler, console_handler,
+                                  respect_handler_level=True)
+    _log_listener.start()
     root_logger.setLevel(level)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(_DropOldestQueueHandler(log_queue))
 
     # Silenciar logs verbosos de bibliotecas externas
     logging.getLogger('urllib3').setLevel(logging.WARNING)
@@ -119,23 +275,21 @@ def setup_logging(log_file: Path, level: int = logging.INFO):
     logging.getLogger('connectionpool').setLevel(logging.WARNING)
 
 
-def extract_links_from_text(html: str, base_url: str) -> Set[str]:
-    """Extrai links de HTML usando BeautifulSoup
+def extract_links_from_text(html: str, base_url: str, base_prefix: Optional[str] = None,
+                            ignored_extensions: FrozenSet[str] = frozenset()) -> List[str]:
+    """Extrai links de HTML usando lxml
 
     Args:
         html: Conteúdo HTML
         base_url: URL base para resolver links relativos
+        base_prefix: Se informado, mantém só links dentro deste prefixo normalizado
+        ignored_extensions: Extensões descartadas quando base_prefix é informado
 
     Returns:
-        Conjunto de URLs normalizadas
+        Lista de URLs normalizadas (pode conter repetições)
     """
-    soup = BeautifulSoup(html, 'lxml')
-    links = set()
-
-    for tag in soup.find_all('a', href=True):
-        href = tag['href']
-        absolute_url = urljoin(base_url, href)
-        normalized = normalize_url(absolute_url)
-        links.add(normalized)
-
-    return links
+    root = lxml.html.document_fromstring(html)
+    links = (urljoin(base_url, href) for href in _LINK_XPATH(root))
+    if base_prefix is not None:
+        return filter_links(links, base_prefix, ignored_extensions)
+    return [normalize_url(link) for link in links]